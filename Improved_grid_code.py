@@ -5,18 +5,20 @@ import matplotlib.pyplot as plt
 from sklearn.model_selection import train_test_split, GridSearchCV
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from imblearn.over_sampling import SMOTE
+from dataset_cache import load
+from feature_engine import MODEL_FEATURES, batch_features
+from hyperparam_search import sklearn_params
+from model_registry import best_params as tuned_params, data_hash, register
+from powerbi_export import EXPORT_DIR, Exporter
 
 
-df = pd.read_excel(r"D:\GridGuard\Codes\Weather_Grid_Data.xlsx")
+df = load("weather")
 
 
-df['Load_per_Voltage'] = df['Load_MW'] / df['Voltage_V']
-df['Pressure_Deviation'] = df['Pressure_hPa'] - df['Pressure_hPa'].mean()
+df = batch_features(df)
 
 
-feature_cols = ['Wind_Speed_kmph', 'Rainfall_mm', 'Pressure_hPa',
-                'Voltage_V', 'Load_MW', 'Past_Outages_Count',
-                'Load_per_Voltage', 'Pressure_Deviation']
+feature_cols = MODEL_FEATURES
 
 X = df[feature_cols]
 y = df['Blackout_Risk']
@@ -37,6 +39,8 @@ best_params = {
     'n_estimators': 200,
     'subsample': 1.0
 }
+# Parameters found by hyperparam_search.py, when it has been run
+best_params.update(sklearn_params(tuned_params("Blackout_Risk")))
 
 model = xgb.XGBClassifier(**best_params, use_label_encoder=False, eval_metric='logloss')
 model.fit(X_train, y_train)
@@ -45,6 +49,9 @@ model.fit(X_train, y_train)
 y_pred = model.predict(X_test)
 
 print("\n✅ Accuracy:", accuracy_score(y_test, y_pred))
+version = register("Blackout_Risk", model, feature_cols, data_hash=data_hash(df[feature_cols + ['Blackout_Risk']]),
+                   metrics={'accuracy': accuracy_score(y_test, y_pred)}, params=best_params, task="classification")
+print(f"\n✅ Registered as Blackout_Risk v{version}")
 print("\n✅ Classification Report:\n", classification_report(y_test, y_pred))
 print("\n✅ Confusion Matrix:\n", confusion_matrix(y_test, y_pred))
 
@@ -58,5 +65,5 @@ plt.show()
 results = X_test.copy()
 results['Actual'] = y_test.values
 results['Predicted'] = y_pred
-results.to_excel("Improved_Predictions.xlsx", index=False)
-print("\n✅ Predictions saved to 'Improved_Predictions.xlsx'")
+entry = Exporter().write_partition("predictions", {"model": "Blackout_Risk", "version": version}, results)
+print(f"\n✅ Predictions saved to '{entry['path']}' under {EXPORT_DIR}")
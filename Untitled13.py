@@ -1,45 +1,17 @@
 import numpy as np
-import pandas as pd
 import networkx as nx
 import matplotlib.pyplot as plt
-from sklearn.cluster import SpectralClustering
 from scipy.spatial import ConvexHull
-from opendssdirect import dss
+from topology_cache import cached_topology
 
-# Load DSS and solve
-dss.Command('ClearAll')
-dss.Command(r'Redirect "D:\GridGuard\Codes\IEEE123Bus\IEEE123Master.dss"')
-dss.Command('Solve')
-
-# Read bus coordinates
-coords = pd.read_csv(
+# Load DSS, build graph and perform spectral clustering
+k = 7
+bus_map, edges, original_labels, pos = cached_topology(
+    r"D:\GridGuard\Codes\IEEE123Bus\IEEE123Master.dss",
     r"D:\GridGuard\Codes\IEEE123Bus\BusCoords.dat",
-    sep=r"[,\s]+", names=["Bus", "X", "Y"], index_col="Bus", engine="python"
+    k=k, random_state=42
 )
-
-# Build graph and weights
-bus_map, edges, idx = {}, [], 0
-ptr = dss.Lines.First()
-while ptr:
-    b1 = dss.Lines.Bus1().split('.')[0]
-    b2 = dss.Lines.Bus2().split('.')[0]
-    for b in (b1, b2):
-        if b not in bus_map:
-            bus_map[b] = idx
-            idx += 1
-    r = dss.Lines.R1()
-    if r > 0:
-        edges.append((bus_map[b1], bus_map[b2], 1.0 / r))
-    ptr = dss.Lines.Next()
-
 n = len(bus_map)
-W = np.zeros((n, n))
-for u, v, w in edges:
-    W[u, v] = W[v, u] = w
-
-# Perform spectral clustering
-k = 7
-original_labels = SpectralClustering(n_clusters=k, affinity="precomputed", random_state=42).fit_predict(W)
 
 # Remap cluster IDs to match visual zones
 label_remap = {
@@ -47,19 +19,6 @@ label_remap = {
 }
 labels = np.vectorize(label_remap.get)(original_labels)
 
-# Positioning
-pos = {}
-for bus, i in bus_map.items():
-    if bus in coords.index:
-        pos[i] = (coords.at[bus, "X"], coords.at[bus, "Y"])
-missing = [i for i in range(n) if i not in pos]
-if missing:
-    tmpG = nx.Graph()
-    tmpG.add_edges_from([(u, v) for u, v, _ in edges])
-    fallback = nx.spring_layout(tmpG, seed=42)
-    for i in missing:
-        pos[i] = fallback[i]
-
 # Define fault zones (Zone 5, 6, 7) and colors
 fault_zones = {4, 5, 6}
 zone_colors = {
@@ -2,31 +2,50 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import os
-from sqlalchemy import create_engine, text
-import requests
 from datetime import datetime
 from streamlit_autorefresh import st_autorefresh
-import random
+import time
+import event_store
+from event_store import rollup
+from weather import CITY_LIST, WeatherCache
+from zone_feed import ZonePoller
 
 st_autorefresh(interval=30000, key="datarefresh")
 
 
 db_path = os.path.abspath("grid.db")
-engine = create_engine(f"sqlite:///{db_path}", future=True)
 
-API_KEY = "dd4d50aa723c21d190cd840f11a01efb"
-CITY_LIST = ["Chennai", "Mumbai", "Delhi", "Kolkata", "Bangalore", "Hyderabad", "Ahmedabad"]
+
+@st.cache_resource
+def db_engine():
+    engine = event_store.connect(db_path)
+    event_store.create_schema(engine)
+    return engine
+
+
+# One cache per server process, refreshed in the background and shared by every session; None when the
+# weather provider cannot be set up (e.g. no API key), which disables the weather panel
+@st.cache_resource
+def weather_cache():
+    try:
+        return WeatherCache().start()
+    except RuntimeError:
+        return None
+
 
 selected_city = st.selectbox("Select City", CITY_LIST, index=0)
 
-weather_url = f"http://api.openweathermap.org/data/2.5/weather?q={selected_city}&appid={API_KEY}&units=metric"
-weather = requests.get(weather_url).json()
+cache = weather_cache()
+weather = cache.get(selected_city) if cache is not None else None
 
-if 'main' in weather:
-    temp = weather['main']['temp']
-    humidity = weather['main']['humidity']
-    wind_speed = round(weather['wind']['speed'] * 3.6, 2)  # Convert to km/h
-    rainfall_mm = weather.get("rain", {}).get("1h", 0.0)
+if weather is None:
+    st.title(" Grid Resilience Dashboard")
+    st.info("Weather panel disabled: set OPENWEATHER_API_KEY, or GRIDGUARD_WEATHER_PROVIDER=stub for offline readings")
+elif weather['data'] is not None:
+    temp = weather['data']['temp']
+    humidity = weather['data']['humidity']
+    wind_speed = weather['data']['wind_speed']
+    rainfall_mm = weather['data']['rainfall_mm']
 
     st.title(" Grid Resilience Dashboard")
     st.subheader(f"Weather in {selected_city}")
@@ -35,6 +54,9 @@ if 'main' in weather:
     col2.metric(" Humidity", f"{humidity}%")
     col3.metric(" Wind Speed", f"{wind_speed} km/h")
     col4.metric(" Rainfall", f"{rainfall_mm} mm")
+    if weather['stale']:
+        st.caption(f"Weather last updated {weather['age'] / 60:.0f} min ago"
+                   + (f" (refresh failed: {weather['error']})" if weather['error'] else ""))
 
     if wind_speed > 40:
         trigger_reason = " Fault Triggered: Wind speed exceeds 40 km/h"
@@ -45,36 +67,63 @@ if 'main' in weather:
 
     st.markdown(f"<div style='color:{'red' if '' in trigger_reason else 'green'}; font-size:16px;'>{trigger_reason}</div>", unsafe_allow_html=True)
 else:
-    st.error("Failed to fetch weather data. Check API key or city name.")
+    st.error(f"Failed to fetch weather data: {weather['error']}")
+
+
+# One poller per server process follows the latest-state table; every session reads from it
+@st.cache_resource
+def zone_poller():
+    return ZonePoller(db_engine()).start()
 
 
-query = "SELECT * FROM resilience_data"
 try:
-    with engine.connect() as conn:
-        df = pd.read_sql(text(query), conn)
+    poller = zone_poller()
 except Exception as e:
     st.error(f"Failed to load grid data: {e}")
     st.stop()
+if poller.error:
+    st.warning(f"Grid data may be out of date: {poller.error}")
+
+# This session's metrics per zone, rebuilt only for the zones changed since its last run
+view = st.session_state.setdefault("zone_view", {})
+version, changed = poller.snapshot(st.session_state.get("zone_version", 0))
+for zone, zdata in changed.items():
+    view[zone] = {
+        "Fault": zdata['fault_triggered'],
+        "Resilience Score": zdata['resilience_score'],
+        "Blackout Time": f"{zdata['blackout_time']:.2f} h",
+        "Recovery Time": f"{zdata['recovery_time']:.2f} h",
+        "Load Lost": f"{zdata['load_lost']} kW",
+        "Power Restored": f"{zdata['power_restored']}%",
+    }
+st.session_state["zone_version"] = version
 
 st.subheader(" Zone-Wise Resilience Summary")
 
 # Show metrics for each zone
-zones = df['zone'].unique()
-for zone in zones:
-    zdata = df[df['zone'] == zone].iloc[0]
+for zone in sorted(view):
     with st.container():
-        st.markdown(f"### 🔹{zone}")
-        c1, c2, c3, c4, c5, c6 = st.columns(6)
-        c1.metric("Fault", zdata['fault'])
-        c2.metric("Resilience Score", zdata['resilience_score'])
-        c3.metric("Blackout Time", f"{random.randint(10, 60) if zdata['fault'] == 'Yes' else 0} min")
-        c4.metric("Recovery Time", f"{random.randint(20, 90) if zdata['fault'] == 'Yes' else 5} min")
-        c5.metric("Load Lost", f"{random.uniform(20, 100) if zdata['fault'] == 'Yes' else random.uniform(5, 20):.2f} MW")
-        c6.metric("Power Restored", f"{random.uniform(10, 90):.2f} MW")
+        st.markdown(f"### 🔹{zone}" + (" (updated)" if zone in changed and len(changed) < len(view) else ""))
+        for col, (label, value) in zip(st.columns(6), view[zone].items()):
+            col.metric(label, value)
         st.divider()
 
 st.subheader(" Fault Distribution")
-fault_counts = df['fault'].value_counts().reset_index()
+fault_counts = pd.Series([v["Fault"] for v in view.values()], dtype=object).value_counts().reset_index()
 fault_counts.columns = ['fault_status', 'count']
 fig = px.pie(fault_counts, names='fault_status', values='count', title='Fault vs No Fault Zones')
 st.plotly_chart(fig)
+
+
+# Last 24 hours from the hourly rollup: the same 24 rows per zone however much history is stored. Shared by
+# every session for a minute
+@st.cache_data(ttl=60)
+def faults_last_day():
+    hourly = rollup(db_engine(), "1h", since=time.time() - 86400)
+    return hourly.groupby('zone', as_index=False)[['faults', 'load_lost']].sum()
+
+
+st.subheader(" Faults in the Last 24 Hours")
+per_zone = faults_last_day()
+if len(per_zone):
+    st.plotly_chart(px.bar(per_zone, x='zone', y='faults', hover_data=['load_lost'], title='Faults per Zone'))
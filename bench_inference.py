@@ -0,0 +1,102 @@
+import argparse
+import http.client
+import json
+import socket
+import threading
+import time
+import numpy as np
+import model_registry
+from dataset_cache import load
+from inference_service import MODELS, build_batchers, make_server
+
+
+class UnixConnection(http.client.HTTPConnection):
+    def __init__(self, path, timeout=10.0):
+        super().__init__("localhost", timeout=timeout)
+        self.unix_path = path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.unix_path)
+
+
+def sample_rows(features, n, seed=0):
+    # Rows from the grid dataset when it has the model's features, zeros otherwise
+    df = load("grid")
+    rng = np.random.default_rng(seed)
+    rows = df.iloc[rng.integers(len(df), size=n)]
+    out = []
+    for _, row in rows.iterrows():
+        out.append({f: (row[f].item() if hasattr(row[f], "item") else str(row[f])) if f in row else 0.0
+                    for f in features})
+    return out
+
+
+def client(connect, alias, payloads, latencies, codes, stop_at):
+    conn = connect()
+    for body in payloads:
+        if time.perf_counter() > stop_at:
+            break
+        t0 = time.perf_counter()
+        conn.request("POST", f"/predict/{alias}", body=body, headers={"Content-Type": "application/json"})
+        resp = conn.getresponse()
+        resp.read()
+        latencies.append(time.perf_counter() - t0)
+        codes.append(resp.status)
+    conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Localhost load test for inference_service")
+    parser.add_argument("--model", default="recovery_time", help=f"one of {sorted(MODELS)}")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=500, help="requests per client")
+    parser.add_argument("--rows", type=int, default=1, help="rows per request")
+    parser.add_argument("--seconds", type=float, default=30.0, help="stop after this long")
+    parser.add_argument("--port", type=int, default=None, help="use a running service on this port")
+    parser.add_argument("--unix", default=None, help="use a running service on this Unix socket")
+    args = parser.parse_args()
+
+    server = None
+    if args.port is None and args.unix is None:
+        # No service given: run one in-process on an ephemeral port
+        server = make_server(build_batchers({args.model: MODELS[args.model]}), port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        args.port = server.server_address[1]
+    if args.unix:
+        connect = lambda: UnixConnection(args.unix)
+    else:
+        connect = lambda: http.client.HTTPConnection("127.0.0.1", args.port, timeout=10.0)
+
+    features = model_registry.load(MODELS[args.model]).features
+    rows = sample_rows(features, args.clients * args.requests * args.rows)
+    bodies = [json.dumps({"rows": rows[i:i + args.rows]}) for i in range(0, len(rows), args.rows)]
+
+    latencies, codes = [], []
+    stop_at = time.perf_counter() + args.seconds
+    threads = [threading.Thread(target=client, args=(connect, args.model, bodies[c::args.clients], latencies,
+                                                      codes, stop_at))
+               for c in range(args.clients)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - t0
+
+    lat = np.array(latencies) * 1e3
+    statuses = dict(zip(*np.unique(codes, return_counts=True)))
+    ok = statuses.get(200, 0)
+    print(f"Clients: {args.clients} | Rows/request: {args.rows} | Requests: {len(lat)} in {elapsed:.2f}s")
+    print(f"Status codes: { {int(k): int(v) for k, v in statuses.items()} }")
+    print(f"Client latency: p50 {np.percentile(lat, 50):.2f} ms, p99 {np.percentile(lat, 99):.2f} ms")
+    print(f"Throughput: {ok / elapsed:.0f} requests/s, {ok * args.rows / elapsed:.0f} rows/s")
+
+    conn = connect()
+    conn.request("GET", "/stats")
+    stats = json.loads(conn.getresponse().read())[args.model]
+    for key, val in stats.items():
+        print(f"server {key}: {val:.4g}" if isinstance(val, float) else f"server {key}: {val}")
+    if server is not None:
+        server.shutdown()
@@ -0,0 +1,180 @@
+import argparse
+import multiprocessing as mp
+import os
+import time
+import numpy as np
+import pandas as pd
+from sqlalchemy.exc import OperationalError
+import event_store
+from dataset_cache import CACHE_DIR, load
+
+BENCH_DB = os.path.join(CACHE_DIR, "bench_ingest.db")
+
+
+def _derived(load_lost, blackout):
+    # power_restored and resilience_score the way init_db.py derives them
+    restored = np.maximum(80, 100 - load_lost // 5)
+    score = np.round(np.clip(10 - load_lost / 100 - blackout / 5, 0, 10), 2)
+    return restored, score
+
+
+def _events(fault, load_lost, blackout, recovery):
+    restored, score = _derived(load_lost, blackout)
+    df = pd.DataFrame({"zone": 0, "fault_triggered": np.where(fault, "Yes", "No"), "load_lost": load_lost,
+                       "blackout_time": blackout, "recovery_time": recovery, "power_restored": restored,
+                       "resilience_score": score})
+    return df.to_dict("records")
+
+
+def grid_events():
+    # RealTime_GridDataset_500.xlsx rows as zone events; zones are assigned at replay time
+    df = load("grid")
+    fault = (df["Fault_Occurred"].astype(str) == "Yes").to_numpy()
+    load_lost = np.where(fault, (df["Load_MW"] * 1000).round(), 0).astype(np.int64)
+    hours = np.where(fault, (df["Time_To_Recovery_min"] / 60).round(2), 0.0)
+    return _events(fault, load_lost, hours, hours)
+
+
+def synthetic_events(n=10000, seed=0):
+    # Same distributions as init_db.random_event
+    rng = np.random.default_rng(seed)
+    fault = rng.random(n) < 0.6
+    load_lost = np.where(fault, rng.integers(100, 501, n), 0)
+    blackout = np.where(fault, rng.uniform(1.0, 4.0, n).round(2), 0.0)
+    recovery = np.where(fault, (blackout + rng.uniform(1.0, 2.0, n)).round(2), 0.0)
+    return _events(fault, load_lost, blackout, recovery)
+
+
+def file_events(path):
+    # Simulation output with the event columns (CSV or Parquet); a zone column is ignored
+    df = pd.read_parquet(path) if path.endswith(".parquet") else pd.read_csv(path)
+    df["zone"] = 0
+    return df[event_store.COLUMNS].to_dict("records")
+
+
+def writer(db, events, zones, rate, batch, seconds, offset, start, out):
+    # Appends batches on a fixed schedule (rate events/s, 0 = flat out). The busy handler is off, so every
+    # SQLITE_BUSY surfaces here and is counted, then retried with a short backoff
+    engine = event_store.connect(db, timeout=0)
+    interval = batch / rate if rate else 0.0
+    latencies, busy, blocked, written, k, pos = [], 0, 0.0, 0, 0, offset
+    start.wait()
+    t_start = time.perf_counter()
+    while time.perf_counter() - t_start < seconds:
+        due = t_start + k * interval
+        if due > time.perf_counter():
+            time.sleep(due - time.perf_counter())
+        rows = []
+        for _ in range(batch):
+            e = dict(events[pos % len(events)])
+            e["zone"] = zones[pos % len(zones)]
+            rows.append(e)
+            pos += 1
+        t0 = time.perf_counter()
+        tries = 0
+        while True:
+            try:
+                event_store.append(engine, rows)
+                break
+            except OperationalError as exc:
+                if "locked" not in str(exc) and "busy" not in str(exc):
+                    raise
+                busy += 1
+                pause = min(0.001 * 2 ** tries, 0.02)
+                tries += 1
+                time.sleep(pause)
+                blocked += pause
+        latencies.append(time.perf_counter() - t0)
+        written += batch
+        k += 1
+    lag = max(0.0, time.perf_counter() - (t_start + k * interval)) if interval else 0.0
+    out.put({"latencies": latencies, "busy": busy, "blocked": blocked, "written": written, "lag": lag,
+             "elapsed": time.perf_counter() - t_start})
+
+
+def reader(db, seconds, start, out):
+    # The dashboard's latest-state query, as often as it will go
+    engine = event_store.connect(db)
+    latencies = []
+    start.wait()
+    stop_at = time.perf_counter() + seconds
+    with engine.connect() as conn:
+        while time.perf_counter() < stop_at:
+            t0 = time.perf_counter()
+            conn.exec_driver_sql(f"SELECT * FROM {event_store.LATEST}").fetchall()
+            latencies.append(time.perf_counter() - t0)
+            conn.rollback()
+            time.sleep(0.001)
+    out.put({"reader": latencies})
+
+
+def _pct(values, qs=(50, 95, 99)):
+    ms = np.asarray(values) * 1e3
+    return " | ".join(f"p{q} {np.percentile(ms, q):.2f} ms" for q in qs) + f" | max {ms.max():.2f} ms"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Replay zone events into the event table under load")
+    parser.add_argument("--source", default="synthetic", help="synthetic, grid, or a CSV/Parquet file of events")
+    parser.add_argument("--zones", type=int, default=200)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=5000.0, help="total events/s (0: as fast as possible)")
+    parser.add_argument("--batch", type=int, default=50, help="events per transaction")
+    parser.add_argument("--readers", type=int, default=1, help="processes polling the latest-state table")
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--db", default=None, help=f"append to this database (default: a fresh {BENCH_DB})")
+    args = parser.parse_args()
+
+    db = args.db or BENCH_DB
+    if args.db is None:
+        os.makedirs(os.path.dirname(db), exist_ok=True)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db + suffix):
+                os.remove(db + suffix)
+    engine = event_store.connect(db)
+    event_store.create_schema(engine)
+    with engine.connect() as conn:
+        before = conn.exec_driver_sql(f"SELECT count(*) FROM {event_store.EVENTS}").scalar()
+
+    if args.source == "synthetic":
+        events = synthetic_events()
+    elif args.source == "grid":
+        events = grid_events()
+    else:
+        events = file_events(args.source)
+
+    # Each writer owns an interleaved share of the zones, as separate feeders would
+    zones = list(range(1, args.zones + 1))
+    start, out = mp.Event(), mp.Queue()
+    procs = [mp.Process(target=writer, args=(db, events, zones[w::args.writers], args.rate / args.writers,
+                                             args.batch, args.seconds, w * 7919, start, out))
+             for w in range(args.writers)]
+    procs += [mp.Process(target=reader, args=(db, args.seconds, start, out)) for _ in range(args.readers)]
+    for p in procs:
+        p.start()
+    start.set()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+
+    writers = [r for r in results if "reader" not in r]
+    latencies = np.concatenate([r["latencies"] for r in writers])
+    written = sum(r["written"] for r in writers)
+    elapsed = max(r["elapsed"] for r in writers)
+    busy = sum(r["busy"] for r in writers)
+    with engine.connect() as conn:
+        stored = conn.exec_driver_sql(f"SELECT count(*) FROM {event_store.EVENTS}").scalar() - before
+
+    target = f"{args.rate:,.0f} events/s" if args.rate else "flat out"
+    print(f"Source: {args.source} ({len(events)} events) | zones {args.zones} | writers {args.writers} | "
+          f"batch {args.batch} | target {target}")
+    print(f"Sustained: {written / elapsed:,.0f} events/s ({written:,} events in {elapsed:.1f}s, "
+          f"{stored:,} stored), up to {max(r['lag'] for r in writers):.2f}s behind schedule")
+    print(f"Commit latency: {_pct(latencies)}")
+    print(f"Lock contention: {busy} busy retries on {len(latencies)} commits "
+          f"({busy / max(len(latencies), 1):.2f} per commit), {sum(r['blocked'] for r in writers):.2f}s backing off")
+    for r in results:
+        if "reader" in r and r["reader"]:
+            print(f"Latest-state reads: {len(r['reader'])} | {_pct(r['reader'])}")
+    size = sum(os.path.getsize(db + s) for s in ("", "-wal") if os.path.exists(db + s))
+    print(f"Database: {size / 2 ** 20:.1f} MB with WAL ({db})")
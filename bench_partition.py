@@ -0,0 +1,47 @@
+import os
+import time
+import numpy as np
+from grid_topology import build_adjacency, spectral_zones
+from topology_cache import cached_topology
+from zone_partition import IncrementalPartitioner, match_zones
+
+folder_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "IEEE123Bus")
+dss_path = os.path.join(folder_path, "IEEE123Master.dss")
+coords_path = os.path.join(folder_path, "BusCoords.dat")
+k = 7
+trials = 50
+
+bus_map, edges, labels, pos = cached_topology(dss_path, coords_path, k=k, random_state=42)
+n = len(bus_map)
+W = build_adjacency(edges, n)
+part = IncrementalPartitioner(W, k=k, random_state=42, labels=labels)
+rng = np.random.default_rng(0)
+
+# Each trial toggles one line: open a closed line, or re-close it on the next trial
+inc_times, full_times, kept, opened = [], [], [], None
+for t in range(trials):
+    if opened is None:
+        u, v, w = edges[rng.integers(len(edges))]
+        change, opened = (u, v, 0.0), (u, v, w)
+    else:
+        change, opened = opened, None
+
+    before = part.labels.copy()
+    t0 = time.perf_counter()
+    inc = part.update([change])
+    inc_times.append(time.perf_counter() - t0)
+    kept.append(np.mean(inc == before))
+
+    t0 = time.perf_counter()
+    full = spectral_zones(part.W, k=k, random_state=42)
+    full_times.append(time.perf_counter() - t0)
+    if t == trials - 1:
+        agree = np.mean(match_zones(full, inc, k) == inc)
+
+print(f"Buses: {n} | Lines: {len(edges)} | Trials: {trials}")
+print(f"Incremental: median {np.median(inc_times) * 1e3:.1f} ms, p95 {np.percentile(inc_times, 95) * 1e3:.1f} ms")
+print(f"Full recompute: median {np.median(full_times) * 1e3:.1f} ms, p95 {np.percentile(full_times, 95) * 1e3:.1f} ms")
+print(f"Speedup (median): {np.median(full_times) / np.median(inc_times):.1f}x")
+print(f"Buses keeping their zone per update: {np.mean(kept) * 100:.1f}%")
+print(f"Agreement with full recompute on final topology: {agree * 100:.1f}%")
+print(f"Eigen-solver fallbacks: {part.fallbacks}")
@@ -0,0 +1,71 @@
+import time
+import numpy as np
+from opendssdirect import dss
+from dss_extract import line_table, node_voltages
+from dss_snapshot import BaseCase, SolveStats
+from fault_injection import apply_fault, compile_model, define_fault_elements, dss_path
+
+trials = 100
+rng = np.random.default_rng(0)
+
+compile_model(dss_path)
+nodes = node_voltages()
+buses = [b for b, g in nodes.groupby("bus", sort=False) if (g["phase"] > 0).any()]
+cases = []
+for bus in rng.choice(buses, trials):
+    phases = sorted(p for p in nodes.loc[nodes["bus"] == bus, "phase"] if p > 0)
+    ftype = "3PH" if len(phases) == 3 and rng.random() < 0.5 else "SLG"
+    cases.append((bus, ftype, float(rng.choice([0.0001, 0.5, 5.0])), phases, float(rng.choice([0.75, 1.0, 1.25]))))
+lines = line_table()
+lines = lines.loc[lines["enabled"], "name"].str.lower().to_numpy()
+outages = [rng.choice(lines, rng.integers(1, 4), replace=False) for _ in range(trials)]
+
+
+def scenario(stats, bus, ftype, r, phases, level):
+    dss.Solution.LoadMult(level)
+    name = apply_fault(bus, ftype, r, phases)
+    stats.solve()
+    dss.Text.Command(f"Edit Fault.{name} enabled=no")
+
+
+def outage(stats, failed):
+    for line in failed:
+        dss.Text.Command(f"Open Line.{line} 1")
+    stats.solve()
+    for line in failed:
+        dss.Text.Command(f"Close Line.{line} 1")
+
+
+def restored(run, items, seed):
+    compile_model(dss_path)
+    define_fault_elements()
+    base = BaseCase()
+    stats, t0 = SolveStats(), time.perf_counter()
+    for item in items:
+        base.restore(seed=seed)
+        run(stats, *item)
+    return stats, time.perf_counter() - t0
+
+
+# Cold: what the entry points do today, a fresh compile and flat start per case
+cold, t0 = SolveStats(), time.perf_counter()
+for case in cases:
+    compile_model(dss_path)
+    define_fault_elements()
+    scenario(cold, *case)
+cold_wall = time.perf_counter() - t0
+
+results = {"faults": {"cold": (cold, cold_wall)}, "outages": {}}
+for label, seed in (("restore", False), ("restore+seed", True)):
+    results["faults"][label] = restored(scenario, cases, seed)
+    results["outages"][label] = restored(outage, [(o,) for o in outages], seed)
+
+for workload, runs in results.items():
+    print(f"{workload.capitalize()}: {trials} scenarios")
+    for label, (stats, wall) in runs.items():
+        s = stats.summary()
+        print(f"{label:>13}: {s['iterations_per_solve']:.2f} iterations/solve "
+              f"({s['control_iterations_per_solve']:.2f} control), {s['ms_per_solve']:.2f} ms/solve, "
+              f"{wall / trials * 1e3:.2f} ms/scenario")
+    plain, seeded = runs["restore"][0], runs["restore+seed"][0]
+    print(f"Seed saves {(plain.iterations - seeded.iterations) / trials:.2f} iterations per scenario")
@@ -0,0 +1,81 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+import model_registry
+from dataset_cache import load
+from tree_export import EXPORT_NAME, export_registered
+
+# Cold start in a fresh interpreter: import, load the model, predict one row; peak RSS from getrusage
+_STARTUP = {
+    "numpy": ("import tree_predictor\n"
+              "m = tree_predictor.load({path!r})\n"
+              "m.raw(np.zeros((1, {n}), dtype=np.float32))\n"),
+    "xgboost": ("import xgboost as xgb\n"
+                "m = xgb.Booster(model_file={path!r})\n"
+                "m.inplace_predict(np.zeros((1, {n}), dtype=np.float32))\n"),
+}
+_PROBE = ("import resource, time, json\n"
+          "t0 = time.perf_counter()\n"
+          "import numpy as np\n"
+          "{body}"
+          "print(json.dumps([time.perf_counter() - t0, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss]))\n")
+
+
+def startup(kind, path, n_features, repeats=5):
+    code = _PROBE.format(body=_STARTUP[kind].format(path=path, n=n_features))
+    runs = [json.loads(subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                      cwd=os.path.dirname(os.path.abspath(__file__))).stdout)
+            for _ in range(repeats)]
+    return np.median([r[0] for r in runs]), np.median([r[1] for r in runs]) / 1024
+
+
+def latency(fn, X, repeats=200):
+    times = []
+    for i in range(repeats):
+        row = X[i % len(X)][None, :]
+        t0 = time.perf_counter()
+        fn(row)
+        times.append(time.perf_counter() - t0)
+    return np.median(times) * 1e6
+
+
+def throughput(fn, X, repeats=5):
+    t0 = time.perf_counter()
+    for _ in range(repeats):
+        fn(X)
+    return len(X) * repeats / (time.perf_counter() - t0)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="NumPy tree predictor vs stock xgboost")
+    parser.add_argument("name", nargs="?", default="Time_To_Recovery_min", help="registered model name")
+    parser.add_argument("--rows", type=int, default=100000)
+    args = parser.parse_args()
+
+    export_registered(args.name)
+    entry = model_registry.load(args.name)
+    trees_path = os.path.join(entry.folder, EXPORT_NAME)
+    import tree_predictor
+    fast = tree_predictor.load(trees_path)
+    booster = entry.model
+
+    df = load("grid")
+    rng = np.random.default_rng(0)
+    X = entry.matrix(df.iloc[rng.integers(len(df), size=args.rows)])
+
+    ref = booster.inplace_predict(X)
+    out = fast.raw(X)
+    diff = np.abs(out.astype(np.float64) - ref.astype(np.float64))
+    print(f"{args.name} v{entry.version}: {fast.meta['trees']} trees, depth {fast.depth}, {fast.meta['objective']}")
+    print(f"Outputs identical: {np.mean(out == ref) * 100:.2f}% | max abs diff {diff.max():.3g}")
+
+    for kind, path in (("numpy", trees_path), ("xgboost", os.path.join(entry.folder, "model.ubj"))):
+        seconds, rss_mb = startup(kind, path, X.shape[1])
+        print(f"{kind:8s} startup {seconds * 1e3:7.1f} ms | peak RSS {rss_mb:6.1f} MB")
+    print(f"numpy    1-row latency {latency(fast.raw, X):7.1f} us | {throughput(fast.raw, X):,.0f} rows/s batched")
+    print(f"xgboost  1-row latency {latency(booster.inplace_predict, X):7.1f} us | "
+          f"{throughput(booster.inplace_predict, X):,.0f} rows/s batched")
@@ -0,0 +1,178 @@
+import argparse
+import time
+import networkx as nx
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import LogisticRegression
+from opendssdirect import dss
+from dataset_cache import load
+from dss_extract import line_table, load_table, node_voltages
+from dss_snapshot import BaseCase
+from fault_injection import compile_model, coords_path, dss_path
+from topology_cache import cached_topology
+
+WEATHER_COLUMNS = ["Wind_Speed_kmph", "Rainfall_mm"]
+V_MIN_PU = 0.9
+Z_95 = 1.96
+
+
+def fit_fragility(name="weather"):
+    # P(outage event | wind, rain) from the outage history; used as each zone's event probability
+    df = load(name, columns=WEATHER_COLUMNS + ["Blackout_Risk"])
+    model = LogisticRegression().fit(df[WEATHER_COLUMNS].to_numpy(), df["Blackout_Risk"].to_numpy())
+    return model, df[WEATHER_COLUMNS].to_numpy(dtype=float)
+
+
+def feeder_tree(root=None):
+    # Each line's upstream lines on the radial feeder; None if the network is meshed
+    G = nx.Graph()
+    ptr = dss.PDElements.First()
+    while ptr:
+        if not dss.PDElements.IsShunt():
+            b = [s.split(".")[0].lower() for s in dss.CktElement.BusNames()[:2]]
+            G.add_edge(*b, name=dss.PDElements.Name().lower())
+        ptr = dss.PDElements.Next()
+    if not nx.is_forest(G):
+        return None
+    root = root or dss.Circuit.AllBusNames()[0].lower()
+    upstream, above = {}, {root: ()}
+    for parent, child in nx.bfs_edges(G, root):
+        name = G.edges[parent, child]["name"]
+        above[child] = above[parent]
+        if name.startswith("line."):
+            upstream[name[5:]] = set(above[parent])
+            above[child] = above[parent] + (name[5:],)
+    return upstream
+
+
+class ContingencyEngine:
+    def __init__(self, k=7, v_min=V_MIN_PU, path=dss_path):
+        bus_map, _, labels, _ = cached_topology(path, coords_path, k=k, random_state=42)
+        compile_model(path)
+        self.k, self.v_min = k, v_min
+        zone_of = {b: int(labels[i]) for b, i in bus_map.items()}
+
+        lines = line_table()
+        lines = lines[lines["enabled"]].reset_index(drop=True)
+        self.lines = lines["name"].str.lower().to_numpy()
+        self.line_zone = np.array([zone_of.get(b, zone_of.get(a, 0))
+                                   for a, b in zip(lines["from_bus"], lines["to_bus"])])
+        # Each zone's event rate is spread over its lines by length
+        length = lines["length"].to_numpy()
+        zone_length = np.bincount(self.line_zone, weights=length, minlength=k)
+        self.line_share = length / zone_length[self.line_zone]
+
+        loads = load_table()
+        self.load_kw = loads["kw"].to_numpy()
+        self.load_zone = np.array([zone_of.get(b, k) for b in loads["bus"]])
+        nodes = node_voltages()
+        buses = pd.Index(pd.unique(nodes["bus"]))
+        self.node_bus = buses.get_indexer(nodes["bus"])
+        self.load_bus = buses.get_indexer(loads["bus"])
+        self.n_buses = len(buses)
+
+        self.upstream = feeder_tree()
+        self.base = BaseCase()
+        self.cache = {frozenset(): np.zeros(k)}
+        self.evaluations = 0
+
+    def canonical(self, failed):
+        # On a radial feeder an outage below another failed line changes nothing: drop it, so
+        # dominated sets collapse onto the same cache entry
+        if self.upstream is None or len(failed) < 2:
+            return frozenset(failed)
+        return frozenset(l for l in failed if not (self.upstream.get(l, set()) & failed))
+
+    def load_lost(self, outage):
+        hit = self.cache.get(outage)
+        if hit is not None:
+            return hit
+        self.base.restore()
+        for line in outage:
+            dss.Text.Command(f"Open Line.{line} 1")
+        try:
+            dss.Solution.Solve()
+        except Exception:
+            pass
+        v = np.asarray(dss.Circuit.AllBusMagPu(), dtype=float)
+        bus_v = np.full(self.n_buses, np.inf)
+        np.minimum.at(bus_v, self.node_bus, v)
+        lost = np.where(bus_v[self.load_bus] < self.v_min, self.load_kw, 0.0)
+        for line in outage:
+            dss.Text.Command(f"Close Line.{line} 1")
+        result = np.bincount(self.load_zone, weights=lost, minlength=self.k + 1)[:self.k]
+        self.cache[outage] = result
+        self.evaluations += 1
+        return result
+
+    def line_probabilities(self, fragility, weather, zone_spread, rng):
+        # weather: (n, 2) wind/rain draws; each zone sees its own gust/cell factor on top of them
+        n = weather.shape[0]
+        factor = rng.lognormal(0.0, zone_spread, size=(n, self.k, 1)) if zone_spread else np.ones((n, self.k, 1))
+        local = weather[:, None, :] * factor
+        p_zone = fragility.predict_proba(local.reshape(-1, 2))[:, 1].reshape(n, self.k)
+        rate = -np.log1p(-np.clip(p_zone, 0.0, 1 - 1e-12))
+        return -np.expm1(-rate[:, self.line_zone] * self.line_share)
+
+    def run(self, fragility, weather_pool, max_order=None, batch=500, min_samples=2000, max_samples=200000,
+            rel_tol=0.05, abs_tol_kw=1.0, zone_spread=0.15, seed=0):
+        rng = np.random.default_rng(seed)
+        n, mean, m2 = 0, np.zeros(self.k), np.zeros(self.k)
+        any_loss = np.zeros(self.k)
+        orders = {}
+        hits = 0
+        t0 = time.perf_counter()
+        while n < max_samples:
+            weather = weather_pool[rng.integers(len(weather_pool), size=batch)]
+            failed = rng.random((batch, len(self.lines))) < self.line_probabilities(fragility, weather,
+                                                                                    zone_spread, rng)
+            for row in failed:
+                key = self.canonical(frozenset(self.lines[row]))
+                if max_order is not None and len(key) > max_order:
+                    # N-k study: keep the max_order failures closest to the source, the most severe ones
+                    key = frozenset(sorted(key, key=lambda l: len(self.upstream.get(l, ())) if self.upstream
+                                           else 0)[:max_order])
+                orders[len(key)] = orders.get(len(key), 0) + 1
+                hits += key in self.cache
+                x = self.load_lost(key)
+                n += 1
+                delta = x - mean
+                mean += delta / n
+                m2 += delta * (x - mean)
+                any_loss += x > 0
+            half = Z_95 * np.sqrt(m2 / max(n - 1, 1) / n)
+            if n >= min_samples and np.all(half <= np.maximum(rel_tol * mean, abs_tol_kw)):
+                break
+
+        risk = pd.DataFrame({
+            "zone": np.arange(1, self.k + 1),
+            "expected_load_lost_kw": mean,
+            "ci95_kw": half,
+            "p_load_loss": any_loss / n,
+        })
+        stats = {"samples": n, "unique_outage_sets": len(self.cache), "power_flows": self.evaluations,
+                 "cache_hits": hits, "orders": dict(sorted(orders.items())),
+                 "seconds": time.perf_counter() - t0}
+        return risk, stats
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Monte Carlo weather contingency risk per zone")
+    parser.add_argument("--wind", type=float, default=None, help="forecast wind speed in km/h")
+    parser.add_argument("--rain", type=float, default=None, help="forecast rainfall in mm")
+    parser.add_argument("--max-order", type=int, default=None, help="cap contingency sets at N-k")
+    parser.add_argument("--rel-tol", type=float, default=0.05)
+    parser.add_argument("--max-samples", type=int, default=200000)
+    args = parser.parse_args()
+
+    fragility, history = fit_fragility()
+    if args.wind is not None or args.rain is not None:
+        pool = np.array([[args.wind or 0.0, args.rain or 0.0]])
+    else:
+        pool = history
+    engine = ContingencyEngine()
+    risk, stats = engine.run(fragility, pool, max_order=args.max_order, rel_tol=args.rel_tol,
+                             max_samples=args.max_samples)
+    print(risk.to_string(index=False))
+    for key, val in stats.items():
+        print(f"{key}: {val:.2f}" if isinstance(val, float) else f"{key}: {val}")
@@ -0,0 +1,169 @@
+import hashlib
+import os
+import tempfile
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pcsv
+import pyarrow.parquet as pq
+
+CACHE_VERSION = 1
+DATA_DIR = os.environ.get("GRIDGUARD_DATA_DIR", os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get("GRIDGUARD_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+CATEGORY = pa.dictionary(pa.int32(), pa.string())
+
+# Declared column types per source; columns a source gains later are typed by inference
+SOURCES = {
+    "grid": ("RealTime_GridDataset_500.xlsx", {
+        "Simulation_ID": pa.int64(),
+        "Bus_Voltage_Drop_pu": pa.float64(),
+        "Line_Current_A": pa.float64(),
+        "Load_MW": pa.float64(),
+        "Wind_Speed_kmph": pa.float64(),
+        "Rainfall_mm": pa.float64(),
+        "Weather_Condition": CATEGORY,
+        "Fault_Occurred": CATEGORY,
+        "Fault_Location": CATEGORY,
+        "Time_To_Recovery_min": pa.float64(),
+        "Microgrid_Survival_hr": pa.float64(),
+        "Fault ID": pa.string(),
+        "Grid Stress Score": pa.float64(),
+        "Weather Risk Level": CATEGORY,
+        "AI Confidence (%)": pa.float64(),
+    }),
+    "weather": ("Weather_Grid_Data.xlsx", {
+        "Wind_Speed_kmph": pa.float64(),
+        "Rainfall_mm": pa.float64(),
+        "Pressure_hPa": pa.float64(),
+        "Voltage_V": pa.float64(),
+        "Load_MW": pa.float64(),
+        "Past_Outages_Count": pa.int64(),
+        "Blackout_Risk": pa.int64(),
+    }),
+    "grid_data": ("grid_data.csv", {
+        "Voltage": pa.float64(),
+        "Current": pa.float64(),
+        "Frequency": pa.float64(),
+        "Weather": CATEGORY,
+    }),
+}
+
+
+def source_path(name, data_dir=DATA_DIR):
+    return os.path.join(data_dir, SOURCES[name][0])
+
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _stamp(path):
+    st = os.stat(path)
+    return {"size": str(st.st_size), "mtime_ns": str(st.st_mtime_ns)}
+
+
+def _read_source(path, types):
+    if path.lower().endswith((".csv", ".txt")):
+        # Arrow's reader parses straight into columns; ISO-8859-1 as the GridGuard exports are written
+        # with it. Categories are encoded below, after the column is read as text
+        text_types = {c: (pa.string() if t == CATEGORY else t) for c, t in types.items()}
+        return pcsv.read_csv(path, read_options=pcsv.ReadOptions(encoding="ISO-8859-1"),
+                             convert_options=pcsv.ConvertOptions(column_types=text_types))
+    return pa.Table.from_pandas(pd.read_excel(path), preserve_index=False)
+
+
+def _apply_schema(table, types):
+    columns, fields = [], []
+    for name in table.column_names:
+        col = table.column(name)
+        target = types.get(name)
+        if target == CATEGORY:
+            col = pc.dictionary_encode(col.cast(pa.string())).cast(CATEGORY)
+        elif target is not None:
+            col = col.cast(target)
+        columns.append(col)
+        fields.append(pa.field(name, col.type))
+    return pa.Table.from_arrays(columns, schema=pa.schema(fields))
+
+
+def _write(path, table, writer):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        writer(table, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _write_ipc(table, path):
+    # Uncompressed, so the file can be memory-mapped and read without copying
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+
+
+def _cache_paths(path, cache_dir):
+    stem = os.path.splitext(os.path.basename(path))[0]
+    key = hashlib.sha256(os.path.abspath(path).encode()).hexdigest()[:16]
+    base = os.path.join(cache_dir, "datasets", f"{stem}_{key}")
+    return base + ".parquet", base + ".arrow"
+
+
+def _fresh(parquet_path, arrow_path, source):
+    # Both files must be readable and stamped by the same conversion, so a run cut short between the two
+    # writes is redone. Same size and mtime as when converted: fresh without hashing. Otherwise the content
+    # hash decides, so a touched but unchanged file is not reconverted
+    try:
+        meta = pq.read_schema(parquet_path).metadata or {}
+        with pa.memory_map(arrow_path, "r") as mapped:
+            arrow_meta = pa.ipc.open_file(mapped).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return False
+    if meta != arrow_meta:
+        return False
+    meta = {k.decode(): v.decode() for k, v in meta.items()}
+    if meta.get("gridguard_version") != str(CACHE_VERSION):
+        return False
+    if all(meta.get(k) == v for k, v in _stamp(source).items()):
+        return True
+    return meta.get("source_sha256") == _file_hash(source)
+
+
+def convert(path, types=None, cache_dir=CACHE_DIR):
+    types = types or {}
+    parquet_path, arrow_path = _cache_paths(path, cache_dir)
+    table = _apply_schema(_read_source(path, types), types)
+    meta = dict(table.schema.metadata or {})
+    meta.update({b"gridguard_version": str(CACHE_VERSION).encode(), b"source_sha256": _file_hash(path).encode()})
+    meta.update({k.encode(): v.encode() for k, v in _stamp(path).items()})
+    table = table.replace_schema_metadata(meta)
+    _write(parquet_path, table, pq.write_table)
+    _write(arrow_path, table, _write_ipc)
+    return parquet_path, arrow_path
+
+
+def cached_table(path, types=None, columns=None, memory_map=False, cache_dir=CACHE_DIR):
+    parquet_path, arrow_path = _cache_paths(path, cache_dir)
+    if not _fresh(parquet_path, arrow_path, path):
+        convert(path, types, cache_dir)
+    if memory_map:
+        # Zero-copy: columns are views into the mapped Arrow file, paged in only when touched
+        table = pa.ipc.open_file(pa.memory_map(arrow_path, "r")).read_all()
+        return table.select(columns) if columns else table
+    return pq.read_table(parquet_path, columns=columns)
+
+
+def load(name, columns=None, memory_map=False, data_dir=DATA_DIR, cache_dir=CACHE_DIR):
+    # A DataFrame, with declared categorical columns as pandas categoricals. memory_map=True returns the
+    # mapped Arrow table instead: converting it to pandas would copy every column and undo the mapping
+    table = cached_table(source_path(name, data_dir), SOURCES[name][1], columns, memory_map, cache_dir)
+    return table if memory_map else table.to_pandas()
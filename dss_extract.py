@@ -0,0 +1,169 @@
+import json
+import numpy as np
+import pandas as pd
+from opendssdirect import dss
+
+LINE_COLUMNS = ["name", "bus1", "bus2", "r1", "x1", "length", "units", "phases", "enabled", "linecode"]
+LOAD_COLUMNS = ["name", "bus1", "phases", "kv", "kw", "kvar", "enabled"]
+CODE_COLUMNS = ["name", "nphases", "r1", "x1", "units", "rmatrix", "xmatrix"]
+# DSS length units in the order of their codes, and each one in metres; "none" takes lengths as they are
+_UNITS = ["none", "mi", "kft", "km", "m", "ft", "in", "cm", "mm"]
+_METRES = pd.Series([np.nan, 1609.344, 304.8, 1000.0, 1.0, 0.3048, 0.0254, 0.01, 0.001], index=_UNITS)
+
+# DSS C-API JSON export flag: include every property, not only the ones set in the script
+_JSON_FULL = 1
+
+
+def _as_bool(values):
+    return values.map(lambda v: v if isinstance(v, bool) else str(v).strip().lower() in ("yes", "true", "y", "1"))
+
+
+def _class_frame(cls, columns):
+    # One call pulls every element of the class; no per-element round trips
+    dss.Circuit.SetActiveClass(cls)
+    records = json.loads(dss.ActiveClass.ToJSON(_JSON_FULL))
+    df = pd.DataFrame.from_records([{k.lower(): v for k, v in rec.items()} for rec in records])
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+    if "enabled" in columns and "enabled" not in df:
+        df["enabled"] = True
+    df = df[columns].copy()
+    df["name"] = df["name"].astype(str).str.split(".").str[-1]
+    if "enabled" in columns:
+        df["enabled"] = _as_bool(df["enabled"])
+    return df
+
+
+def _walk_lines():
+    # Lines.R1/X1 give the engine defaults, not the code's values, on a LineCode line; those are left null
+    # for _fill_sequence_impedance, as the JSON export leaves them
+    rows = []
+    ptr = dss.Lines.First()
+    while ptr:
+        code = dss.Lines.LineCode()
+        r1, x1 = (None, None) if code else (dss.Lines.R1(), dss.Lines.X1())
+        rows.append((dss.Lines.Name(), dss.Lines.Bus1(), dss.Lines.Bus2(), r1, x1, dss.Lines.Length(),
+                     dss.Lines.Units(), dss.Lines.Phases(), True, code))
+        ptr = dss.Lines.Next()
+    return pd.DataFrame(rows, columns=LINE_COLUMNS)
+
+
+def _walk_loads():
+    rows = []
+    ptr = dss.Loads.First()
+    while ptr:
+        rows.append((dss.Loads.Name(), dss.CktElement.BusNames()[0], dss.CktElement.NumPhases(),
+                     dss.Loads.kV(), dss.Loads.kW(), dss.Loads.kvar(), True))
+        ptr = dss.Loads.Next()
+    return pd.DataFrame(rows, columns=LOAD_COLUMNS)
+
+
+def _walk_linecodes():
+    rows = []
+    ptr = dss.LineCodes.First()
+    while ptr:
+        z1 = dss.LineCodes.IsZ1Z0()
+        rows.append((dss.LineCodes.Name(), dss.LineCodes.Phases(), dss.LineCodes.R1() if z1 else None,
+                     dss.LineCodes.X1() if z1 else None, dss.LineCodes.Units(), dss.LineCodes.Rmatrix(),
+                     dss.LineCodes.Xmatrix()))
+        ptr = dss.LineCodes.Next()
+    return pd.DataFrame(rows, columns=CODE_COLUMNS)
+
+
+def _bulk(cls, columns, walk):
+    try:
+        return _class_frame(cls, columns)
+    except (AttributeError, KeyError, TypeError, ValueError):
+        # Engines without ActiveClass.ToJSON fall back to the element iterator
+        return walk()
+
+
+def _bus_name(values):
+    return values.astype(str).str.split(".", n=1).str[0].str.lower()
+
+
+def _units(values):
+    # The JSON export names the length unit, the iterators give its code
+    return values.map(lambda u: str(u).lower() if isinstance(u, str) or u is None else _UNITS[int(u)])
+
+
+def _sequence(matrices, phases):
+    # Positive-sequence value of each phase matrix (mean self term less mean mutual term), computed over
+    # the stacked matrices of each phase count at once
+    out = np.full(len(phases), np.nan)
+    for n in np.unique(phases):
+        idx = np.flatnonzero(phases == n)
+        m = np.stack([np.asarray(matrices[i], dtype=float).reshape(n, n) for i in idx])
+        diag = np.trace(m, axis1=1, axis2=2)
+        out[idx] = diag if n == 1 else diag / n - (m.sum(axis=(1, 2)) - diag) / (n * (n - 1))
+    return out
+
+
+def linecode_table():
+    # R1/X1 per unit length of every LineCode; codes given as phase matrices have them derived
+    df = _bulk("LineCode", CODE_COLUMNS, _walk_linecodes)
+    phases = df["nphases"].astype(int).to_numpy()
+    for col, matrix in (("r1", "rmatrix"), ("x1", "xmatrix")):
+        derived = pd.Series(_sequence(df[matrix].tolist(), phases), index=df.index)
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(derived)
+    df["name"] = df["name"].str.lower()
+    df["units"] = _units(df["units"])
+    return df[["name", "nphases", "r1", "x1", "units"]]
+
+
+def _fill_sequence_impedance(df):
+    # Lines that take their impedance from a LineCode have null R1/X1. The codes come out in one more bulk
+    # call and are joined on the line's linecode, rescaled where the line and the code use different units
+    missing = df["r1"].isna() | df["x1"].isna()
+    if not missing.any():
+        return df
+    codes = linecode_table().set_index("name")
+    key = df["linecode"].fillna("").astype(str).str.lower()
+    scale = _units(df["units"]).map(_METRES) / key.map(codes["units"]).map(_METRES)
+    scale = scale.fillna(1.0)
+    for col in ("r1", "x1"):
+        df[col] = df[col].fillna(key.map(codes[col]) * scale)
+    return df
+
+
+def line_table():
+    df = _bulk("Line", LINE_COLUMNS, _walk_lines)
+    df = df.astype({"r1": float, "x1": float, "length": float, "phases": int, "enabled": bool})
+    df = _fill_sequence_impedance(df)
+    df["from_bus"] = _bus_name(df["bus1"])
+    df["to_bus"] = _bus_name(df["bus2"])
+    return df
+
+
+def load_table():
+    df = _bulk("Load", LOAD_COLUMNS, _walk_loads)
+    df = df.astype({"phases": int, "kv": float, "kw": float, "kvar": float, "enabled": bool})
+    df["bus"] = _bus_name(df["bus1"])
+    return df
+
+
+def node_voltages():
+    nodes = pd.Series(dss.Circuit.AllNodeNames(), dtype=str)
+    parts = nodes.str.split(".", n=1)
+    return pd.DataFrame({
+        "node": nodes,
+        "bus": parts.str[0].str.lower(),
+        "phase": pd.to_numeric(parts.str[1], errors="coerce").fillna(0).astype(int),
+        "vmag_pu": np.asarray(dss.Circuit.AllBusMagPu(), dtype=float),
+    })
+
+
+def line_graph(lines):
+    # Bus indices in first-seen order (bus1 before bus2, line by line), as the old walk assigned them
+    lines = lines[lines["enabled"]]
+    ends = np.column_stack([lines["from_bus"].to_numpy(), lines["to_bus"].to_numpy()]).ravel()
+    buses = pd.unique(ends)
+    bus_map = {b: i for i, b in enumerate(buses)}
+
+    index = pd.Index(buses)
+    u = index.get_indexer(lines["from_bus"])
+    v = index.get_indexer(lines["to_bus"])
+    r = lines["r1"].to_numpy()
+    keep = r > 0
+    edges = list(zip(u[keep].tolist(), v[keep].tolist(), (1.0 / r[keep]).tolist()))
+    return bus_map, edges
@@ -0,0 +1,174 @@
+import csv
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+
+# OpenDSS monitor stream: int32 signature, version, record size, mode, then a 256-byte channel header
+MONITOR_SIGNATURE = 43756
+MONITOR_HEADER_BYTES = 16 + 256
+
+
+class MonitorFile:
+    # Zero-copy view over a saved monitor stream; columns and time windows are slices of one memmap
+    def __init__(self, source, channels=None):
+        if isinstance(source, (bytes, bytearray, memoryview)):
+            raw = np.frombuffer(source, dtype=np.uint8)
+        elif isinstance(source, (str, os.PathLike)):
+            raw = np.memmap(source, dtype=np.uint8, mode="r")
+        else:
+            # dss.Monitors.ByteStream() hands back signed bytes
+            raw = np.asarray(source).astype(np.uint8)
+        sig, self.version, self.record_size, self.mode = raw[:16].view("<i4").tolist()
+        if sig != MONITOR_SIGNATURE:
+            raise ValueError(f"not an OpenDSS monitor stream (signature {sig})")
+        header = raw[16:MONITOR_HEADER_BYTES].tobytes().split(b"\0")[0].decode("ascii", "replace")
+        names = [s.strip() for s in header.split(",") if s.strip()]
+        if channels is not None:
+            # The in-memory stream leaves the header blank; dss.Monitors.Header() has the channel names
+            names = ["hour", "t(sec)"] + [c.strip() for c in channels]
+        width = self.record_size + 2
+        if len(names) != width:
+            names = ["hour", "t(sec)"] + [f"ch{i + 1}" for i in range(self.record_size)]
+        self.channels = names
+        body = raw[MONITOR_HEADER_BYTES:]
+        n = body.size // (4 * width)
+        self.data = body[:n * 4 * width].view("<f4").reshape(n, width)
+
+    def __len__(self):
+        return self.data.shape[0]
+
+    @property
+    def hours(self):
+        return self.data[:, 0] + self.data[:, 1] / 3600.0
+
+    def column(self, name):
+        return self.data[:, self.channels.index(name)]
+
+    def window(self, start_h=None, stop_h=None, columns=None):
+        # Rows with start_h <= time < stop_h; only the two time columns are read to locate them
+        hours = self.hours
+        lo = 0 if start_h is None else int(np.searchsorted(hours, start_h, side="left"))
+        hi = len(self) if stop_h is None else int(np.searchsorted(hours, stop_h, side="left"))
+        rows = self.data[lo:hi]
+        if columns is None:
+            return rows
+        return rows[:, [self.channels.index(c) for c in columns]]
+
+    def frame(self, start_h=None, stop_h=None, columns=None):
+        cols = columns or self.channels
+        return pd.DataFrame(self.window(start_h, stop_h, cols), columns=cols)
+
+
+class PlotFile:
+    # DSSView .DSV index plus its .dbl payload: each "Line" record points at 4 blocks of `count`
+    # doubles (terminal 1 and 2 voltages, then terminal 1 and 2 currents, complex re/im pairs)
+    def __init__(self, dsv_path, dbl_path=None):
+        dbl_path = dbl_path or os.path.splitext(dsv_path)[0] + ".dbl"
+        records, self.curves = [], {}
+        with open(dsv_path, newline="") as fh:
+            for row in csv.reader(fh, skipinitialspace=True):
+                if not row:
+                    continue
+                if row[0] == "Line" and len(row) >= 6:
+                    records.append((row[1], row[2], row[3], int(row[4]), int(row[5])))
+                elif row[0] == "Curve":
+                    npts = int(row[1])
+                    values = np.array(row[8:8 + 2 * npts], dtype=float)
+                    self.curves[row[7]] = (values[:npts], values[npts:])
+        self.index = pd.DataFrame(records, columns=["element", "bus1", "bus2", "offset", "count"])
+        if os.path.exists(dbl_path) and os.path.getsize(dbl_path):
+            self.data = np.memmap(dbl_path, dtype="<f8", mode="r")
+        else:
+            self.data = np.empty(0, dtype="<f8")
+
+    def record(self, i):
+        # (4, count/2) complex view: V terminal 1, V terminal 2, I terminal 1, I terminal 2
+        off, count = int(self.index.at[i, "offset"]) // 8, int(self.index.at[i, "count"])
+        return self.data[off:off + 4 * count].view(np.complex128).reshape(4, count // 2)
+
+    def element(self, name):
+        hits = self.index.index[self.index["element"].str.lower() == name.lower()]
+        return [self.record(i) for i in hits]
+
+    def terminal_values(self, block):
+        # block 0/1: terminal voltages, 2/3: terminal currents; one ragged array per record
+        return [self.record(i)[block] for i in range(len(self.index))]
+
+
+def open_qsts(window_dir, mmap_mode="r"):
+    # Output of timeseries.run_window: metadata plus lazily mapped per-quantity arrays
+    with open(os.path.join(window_dir, "meta.json")) as fh:
+        meta = json.load(fh)
+    arrays = {os.path.splitext(f)[0]: np.load(os.path.join(window_dir, f), mmap_mode=mmap_mode)
+              for f in os.listdir(window_dir) if f.endswith(".npy")}
+    return meta, arrays
+
+
+_NUM = r"([-+]?[\d.]+(?:[Ee][-+]?\d+)?)"
+_VLN = re.compile(rf"^\s*(\S+)\s+(?:\.+\s+)?(\d+)\s+{_NUM}\s+/_\s+{_NUM}\s+{_NUM}\s+{_NUM}")
+_CURRENT = re.compile(rf"^(\S+)\s+(\d+)\s+{_NUM}\s+/_\s+{_NUM}\s+=\s+{_NUM}\s+\+j\s+{_NUM}")
+_POWER = re.compile(rf"^(\S+)\s+(\d+)\s+{_NUM}\s+\+j\s+{_NUM}\s+{_NUM}\s+{_NUM}")
+_ELEMENT = re.compile(r'^ELEMENT\s*=\s*"([^"]+)"')
+
+
+def read_voltage_report(path):
+    # "Show Voltage LN Nodes": one row per bus node
+    bus, rows = None, []
+    with open(path) as fh:
+        for line in fh:
+            m = _VLN.match(line)
+            if m:
+                if m.group(1) != "-":
+                    bus = m.group(1).lower()
+                rows.append((bus, int(m.group(2)), *map(float, m.group(3, 4, 5, 6))))
+    df = pd.DataFrame(rows, columns=["bus", "node", "vmag_kv", "vang_deg", "vpu", "base_kv"])
+    return df.astype({"bus": "category", "node": np.int16, "vmag_kv": np.float32, "vang_deg": np.float32,
+                      "vpu": np.float32, "base_kv": np.float32})
+
+
+def _element_report(path, pattern, columns, terminal_break):
+    element, terminal, rows = None, 1, []
+    with open(path) as fh:
+        for line in fh:
+            m = _ELEMENT.match(line)
+            if m:
+                element, terminal = m.group(1).lower(), 1
+                continue
+            if element is None:
+                continue
+            if terminal_break(line):
+                terminal += 1
+                continue
+            m = pattern.match(line)
+            if m:
+                rows.append((element, terminal, m.group(1).lower(), int(m.group(2)), *map(float, m.groups()[2:])))
+    df = pd.DataFrame(rows, columns=["element", "terminal", "bus", "phase"] + columns)
+    return df.astype({"element": "category", "terminal": np.int8, "bus": "category", "phase": np.int8,
+                      **{c: np.float32 for c in columns}})
+
+
+def read_current_report(path):
+    # "Show Currents Elements": terminals are separated by a dashed line
+    return _element_report(path, _CURRENT, ["imag_a", "iang_deg", "i_re", "i_im"],
+                           lambda line: line.startswith("---"))
+
+
+def read_power_report(path):
+    # "Show Powers kva Elements": each terminal ends with a TERMINAL TOTAL line
+    return _element_report(path, _POWER, ["kw", "kvar", "kva", "pf"],
+                           lambda line: line.lstrip().startswith("TERMINAL TOTAL"))
+
+
+def read_tap_report(path):
+    rows = []
+    with open(path) as fh:
+        for line in fh:
+            parts = line.split()
+            if len(parts) >= 10 and parts[0] != "Name":
+                rows.append(parts[:10])
+    df = pd.DataFrame(rows, columns=["transformer", "regcontrol", "tap", "min", "max", "step", "position",
+                                     "winding", "direction", "cogen"])
+    return df.astype({"tap": np.float32, "min": np.float32, "max": np.float32, "step": np.float32,
+                      "position": np.int16, "winding": np.int8})
@@ -0,0 +1,84 @@
+import time
+from opendssdirect import dss
+
+
+def _names(iface):
+    names = []
+    ptr = iface.First()
+    while ptr:
+        names.append(iface.Name())
+        ptr = iface.Next()
+    return names
+
+
+class BaseCase:
+    # State of the solved base case, put back in place before each scenario instead of recompiling
+    def __init__(self, loads=False):
+        self.load_mult = dss.Solution.LoadMult()
+        self.regs = _names(dss.RegControls)
+        self.taps = []
+        for name in self.regs:
+            dss.RegControls.Name(name)
+            self.taps.append(dss.RegControls.TapNumber())
+        self.caps = _names(dss.Capacitors)
+        self.cap_states = []
+        for name in self.caps:
+            dss.Capacitors.Name(name)
+            self.cap_states.append(list(dss.Capacitors.States()))
+        self.loads = _names(dss.Loads) if loads else []
+        self.load_kw, self.load_kvar = [], []
+        for name in self.loads:
+            dss.Loads.Name(name)
+            self.load_kw.append(dss.Loads.kW())
+            self.load_kvar.append(dss.Loads.kvar())
+        # Solver node voltages as re/im pairs, slot 0 being ground
+        self.voltages = dss.YMatrix.getV()
+
+    def restore(self, seed=True):
+        for name, tap in zip(self.regs, self.taps):
+            dss.RegControls.Name(name)
+            dss.RegControls.TapNumber(tap)
+        for name, states in zip(self.caps, self.cap_states):
+            dss.Capacitors.Name(name)
+            dss.Capacitors.States(states)
+        for name, kw, kvar in zip(self.loads, self.load_kw, self.load_kvar):
+            dss.Loads.Name(name)
+            dss.Loads.kW(kw)
+            dss.Loads.kvar(kvar)
+        dss.Solution.LoadMult(self.load_mult)
+        if seed:
+            self.seed()
+
+    def seed(self):
+        # Next Solve starts from the base-case voltages rather than the last (e.g. faulted or outaged)
+        # solution; skipped if nodes were added since the snapshot was taken
+        if len(dss.YMatrix.getV()) != len(self.voltages):
+            return False
+        dss.YMatrix.VVector()[0:len(self.voltages)] = self.voltages
+        return True
+
+
+class SolveStats:
+    # Running totals of solver work, to compare restore strategies
+    def __init__(self):
+        self.solves, self.iterations, self.control_iterations, self.seconds = 0, 0, 0, 0.0
+
+    def solve(self):
+        t0 = time.perf_counter()
+        try:
+            dss.Solution.Solve()
+        finally:
+            self.seconds += time.perf_counter() - t0
+            self.solves += 1
+            self.iterations += dss.Solution.Iterations()
+            self.control_iterations += dss.Solution.ControlIterations()
+        return dss.Solution.Converged()
+
+    def summary(self):
+        n = max(self.solves, 1)
+        return {
+            "solves": self.solves,
+            "iterations_per_solve": self.iterations / n,
+            "control_iterations_per_solve": self.control_iterations / n,
+            "ms_per_solve": self.seconds / n * 1e3,
+        }
@@ -0,0 +1,193 @@
+import argparse
+import os
+import time
+import pandas as pd
+from sqlalchemy import create_engine, event, text
+
+db_path = os.path.abspath("grid.db")
+
+EVENTS = "resilience_events"
+LATEST = "resilience_data"
+COLUMNS = ["zone", "fault_triggered", "load_lost", "blackout_time", "recovery_time", "power_restored",
+           "resilience_score"]
+RAW_DAYS = 7
+# Rollup grain -> (bucket start from a unix time, period label, days kept; None keeps everything). Buckets are UTC
+ROLLUPS = {
+    "1m": ("CAST({ts} / 60 AS INTEGER) * 60", "%Y-%m-%d %H:%M", 2),
+    "1h": ("CAST({ts} / 3600 AS INTEGER) * 3600", "%Y-%m-%d %H:00", 365),
+    "1d": ("CAST({ts} / 86400 AS INTEGER) * 86400", "%Y-%m-%d", None),
+    "1mo": ("CAST(strftime('%s', {ts}, 'unixepoch', 'start of month') AS INTEGER)", "%Y-%m", None),
+}
+
+# Events are only ever appended; ids come from AUTOINCREMENT, so they are never reused and readers can
+# follow the table with an id high-water mark. resilience_data keeps the newest event of each zone for the
+# dashboards, and each resilience_rollup_<grain> table holds per-zone totals that every append adds into
+_SCHEMA = [
+    f"""CREATE TABLE IF NOT EXISTS {EVENTS} (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, ts REAL NOT NULL, zone INTEGER NOT NULL, fault_triggered TEXT,
+        load_lost INTEGER, blackout_time REAL, recovery_time REAL, power_restored INTEGER,
+        resilience_score REAL)""",
+    f"CREATE INDEX IF NOT EXISTS ix_{EVENTS}_zone_ts ON {EVENTS} (zone, ts)",
+    f"""CREATE TABLE IF NOT EXISTS {LATEST} (
+        zone INTEGER PRIMARY KEY, fault_triggered TEXT, load_lost INTEGER, blackout_time REAL,
+        recovery_time REAL, power_restored INTEGER, resilience_score REAL, ts REAL NOT NULL,
+        event_id INTEGER NOT NULL)""",
+] + [
+    f"""CREATE TABLE IF NOT EXISTS resilience_rollup_{grain} (
+        zone INTEGER NOT NULL, bucket INTEGER NOT NULL, period TEXT NOT NULL, events INTEGER NOT NULL,
+        faults INTEGER NOT NULL, load_lost INTEGER, blackout_time REAL, recovery_time REAL,
+        resilience_score_sum REAL, resilience_score_mean REAL, PRIMARY KEY (zone, bucket))"""
+    for grain in ROLLUPS
+]
+_VALUES = ", ".join(COLUMNS[1:])
+_INSERT = f"INSERT INTO {EVENTS} (ts, {', '.join(COLUMNS)}) VALUES ({', '.join('?' * (len(COLUMNS) + 1))})"
+_LATEST = f"""
+    INSERT INTO {LATEST} (zone, {_VALUES}, ts, event_id) VALUES ({', '.join('?' * (len(COLUMNS) + 2))})
+    ON CONFLICT (zone) DO UPDATE SET {', '.join(f'{c} = excluded.{c}' for c in COLUMNS[1:])},
+        ts = excluded.ts, event_id = excluded.event_id
+    WHERE excluded.ts >= {LATEST}.ts
+"""
+
+
+def rollup_table(grain):
+    return f"resilience_rollup_{grain}"
+
+
+def _rollup_sql(grain):
+    # Adds the aggregates of one id range of events into the grain's rows; the mean is re-derived from the
+    # old and added sums
+    bucket, fmt, _ = ROLLUPS[grain]
+    return f"""
+        INSERT INTO {rollup_table(grain)}
+        SELECT zone, {bucket.format(ts="ts")} AS b, strftime('{fmt}', ts, 'unixepoch'), count(*),
+            sum(fault_triggered = 'Yes'), sum(load_lost), sum(blackout_time), sum(recovery_time),
+            sum(resilience_score), sum(resilience_score) * 1.0 / count(*)
+        FROM {EVENTS} WHERE id BETWEEN :first AND :last GROUP BY zone, b
+        ON CONFLICT (zone, bucket) DO UPDATE SET events = events + excluded.events,
+            faults = faults + excluded.faults, load_lost = load_lost + excluded.load_lost,
+            blackout_time = blackout_time + excluded.blackout_time,
+            recovery_time = recovery_time + excluded.recovery_time,
+            resilience_score_sum = resilience_score_sum + excluded.resilience_score_sum,
+            resilience_score_mean = (resilience_score_sum + excluded.resilience_score_sum)
+                / (events + excluded.events)
+    """
+
+
+_ROLLUP = {grain: _rollup_sql(grain) for grain in ROLLUPS}
+
+
+def connect(path=db_path, timeout=30.0):
+    # WAL lets the dashboards read while writers append; NORMAL sync is still crash-safe under WAL
+    engine = create_engine(f"sqlite:///{path}", future=True, connect_args={"timeout": timeout})
+
+    @event.listens_for(engine, "connect")
+    def _pragmas(dbapi_conn, _):
+        cur = dbapi_conn.cursor()
+        cur.execute("PRAGMA journal_mode=WAL")
+        cur.execute("PRAGMA synchronous=NORMAL")
+        cur.close()
+
+    return engine
+
+
+def create_schema(engine):
+    with engine.begin() as conn:
+        # Only takes effect on a new file, which is when it is needed
+        conn.exec_driver_sql("PRAGMA auto_vacuum=INCREMENTAL")
+        legacy = None
+        info = conn.exec_driver_sql(f"PRAGMA table_info({LATEST})").fetchall()
+        if info and "event_id" not in [row[1] for row in info]:
+            # The old update-in-place table: its rows become the first events
+            legacy = pd.read_sql(text(f"SELECT * FROM {LATEST}"), conn)
+            conn.exec_driver_sql(f"DROP TABLE {LATEST}")
+        for statement in _SCHEMA:
+            conn.exec_driver_sql(statement)
+    if legacy is not None and len(legacy):
+        append(engine, legacy[COLUMNS].to_dict("records"))
+
+
+def append(engine, events):
+    # One transaction per batch: a single prepared INSERT run over every event, then each zone's newest
+    # event copied into the latest-state table and the batch added into every rollup. Events without a
+    # "ts" are stamped now
+    if not events:
+        return 0
+    now = time.time()
+    rows = [(e.get("ts", now), *(e[c] for c in COLUMNS)) for e in events]
+    with engine.begin() as conn:
+        conn.exec_driver_sql(_INSERT, rows)
+        # The write lock is held, so this batch's ids are the len(rows) ending at the last one
+        first = conn.exec_driver_sql("SELECT last_insert_rowid()").scalar() - len(rows) + 1
+        newest = {}
+        for i, row in enumerate(rows):
+            if row[1] not in newest or row[0] >= rows[newest[row[1]]][0]:
+                newest[row[1]] = i
+        conn.exec_driver_sql(_LATEST, [(*rows[i][1:], rows[i][0], first + i) for i in newest.values()])
+        for sql in _ROLLUP.values():
+            conn.execute(text(sql), {"first": first, "last": first + len(rows) - 1})
+    return len(rows)
+
+
+def zones(engine):
+    with engine.connect() as conn:
+        return [row[0] for row in conn.exec_driver_sql(f"SELECT zone FROM {LATEST} ORDER BY zone")]
+
+
+def rollup(engine, grain, since=None, zones=None):
+    # Rollup rows from `since` (a unix time) on; reads only the rows asked for, however long the history
+    query, params = f"SELECT * FROM {rollup_table(grain)} WHERE bucket >= :since", {"since": int(since or 0)}
+    if zones is not None:
+        query += f" AND zone IN ({', '.join(str(int(z)) for z in zones)})"
+    with engine.connect() as conn:
+        return pd.read_sql(text(query + " ORDER BY bucket, zone"), conn, params=params)
+
+
+def expire(engine, raw_days=RAW_DAYS, now=None):
+    # Raw events older than raw_days are already counted in every rollup, so they are simply deleted, one
+    # short transaction per zone on the (zone, ts) index; rollup rows go once their grain's days are up
+    now = now or time.time()
+    cutoff = now - raw_days * 86400
+    deleted = {}
+    for zone in zones(engine):
+        with engine.begin() as conn:
+            deleted[EVENTS] = deleted.get(EVENTS, 0) + conn.execute(
+                text(f"DELETE FROM {EVENTS} WHERE zone = :zone AND ts < :cutoff"),
+                {"zone": zone, "cutoff": cutoff}).rowcount
+    for grain, (_, _, days) in ROLLUPS.items():
+        if days is not None:
+            with engine.begin() as conn:
+                deleted[rollup_table(grain)] = conn.execute(
+                    text(f"DELETE FROM {rollup_table(grain)} WHERE bucket < :cutoff"),
+                    {"cutoff": int(now - days * 86400)}).rowcount
+    return deleted
+
+
+def maintain(engine, raw_days=RAW_DAYS):
+    # Retention pass, then the freed pages and the WAL are given back
+    deleted = expire(engine, raw_days)
+    with engine.connect() as conn:
+        conn.exec_driver_sql("PRAGMA incremental_vacuum").fetchall()
+        conn.exec_driver_sql("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+    return deleted
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Retention for the resilience event and rollup tables")
+    parser.add_argument("--db", default=db_path)
+    parser.add_argument("--raw-days", type=float, default=RAW_DAYS, help="keep raw events this long")
+    parser.add_argument("--every", type=float, default=0, help="repeat every N seconds (0: run once)")
+    args = parser.parse_args()
+
+    engine = connect(args.db)
+    create_schema(engine)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            deleted = maintain(engine, args.raw_days)
+            print(", ".join(f"{table}: {n} deleted" for table, n in deleted.items()) +
+                  f" ({time.perf_counter() - t0:.2f}s)", flush=True)
+            if not args.every:
+                break
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        print(" Stopped")
@@ -0,0 +1,185 @@
+import argparse
+import itertools
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+import pyarrow as pa
+import pyarrow.parquet as pq
+from opendssdirect import dss
+from dss_extract import line_table, node_voltages
+from dss_snapshot import BaseCase
+from topology_cache import cached_topology
+
+folder_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "IEEE123Bus")
+dss_path = os.path.join(folder_path, "IEEE123Master.dss")
+coords_path = os.path.join(folder_path, "BusCoords.dat")
+
+FAULT_TYPES = ("SLG", "LL", "LLG", "3PH", "LINE_OPEN")
+FAULT_RESISTANCES = (0.0001, 0.5, 5.0, 20.0)
+LOAD_LEVELS = (0.5, 0.75, 1.0, 1.25)
+SAG_PU = 0.9
+
+# Pre-defined fault elements per conductor count; scenarios only Edit and toggle them
+_FAULTS = {"SLG": "inj1", "LL": "inj1", "LLG": "inj2", "3PH": "inj3"}
+_state = {}
+
+
+def compile_model(path=dss_path):
+    dss.Basic.ClearAll()
+    dss.Text.Command(f'Redirect "{path}"')
+    dss.Text.Command("Solve")
+
+
+def fault_scenarios(bus_phases, feeders, fault_types=FAULT_TYPES, resistances=FAULT_RESISTANCES,
+                    load_levels=LOAD_LEVELS):
+    # (bus, fault type, fault resistance, load multiplier); faults needing absent phases are skipped
+    need = {"SLG": 1, "LL": 2, "LLG": 2, "3PH": 3}
+    for bus, phases in bus_phases.items():
+        for ftype in fault_types:
+            if ftype == "LINE_OPEN":
+                if bus in feeders:
+                    for level in load_levels:
+                        yield bus, ftype, float("nan"), level
+            elif len(phases) >= need[ftype]:
+                for r, level in itertools.product(resistances, load_levels):
+                    yield bus, ftype, r, level
+
+
+def define_fault_elements():
+    source = dss.Circuit.AllBusNames()[0]
+    dss.Text.Command(f"New Fault.inj1 phases=1 bus1={source}.1 bus2={source}.0 r=1 enabled=no")
+    dss.Text.Command(f"New Fault.inj2 phases=2 bus1={source}.1.2 bus2={source}.0.0 r=1 enabled=no")
+    dss.Text.Command(f"New Fault.inj3 phases=3 bus1={source}.1.2.3 bus2={source}.0.0.0 r=1 enabled=no")
+    dss.Solution.Solve()
+
+
+def apply_fault(bus, ftype, r, phases):
+    # Moves the matching pre-defined fault element onto `bus` and enables it; returns its name
+    if ftype == "LL":
+        conn = (f"{bus}.{phases[0]}", f"{bus}.{phases[1]}")
+    else:
+        m = {"SLG": 1, "LLG": 2, "3PH": 3}[ftype]
+        conn = (".".join([bus] + [str(p) for p in phases[:m]]), ".".join([bus] + ["0"] * m))
+    name = _FAULTS[ftype]
+    dss.Text.Command(f"Edit Fault.{name} bus1={conn[0]} bus2={conn[1]} r={r} enabled=yes")
+    return name
+
+
+def _init_worker(path, node_zone, k, feeders):
+    compile_model(path)
+    define_fault_elements()
+    _state.update(node_zone=np.asarray(node_zone), k=k, feeders=feeders, base=BaseCase())
+
+
+def _restore():
+    # Base-case taps, capacitor states and load level, with the solver seeded from base voltages
+    _state["base"].restore()
+
+
+def _apply(bus, ftype, r, phases):
+    if ftype == "LINE_OPEN":
+        line = _state["feeders"][bus]
+        dss.Text.Command(f"Open Line.{line} 1")
+        return lambda: dss.Text.Command(f"Close Line.{line} 1")
+
+    name = apply_fault(bus, ftype, r, phases)
+    return lambda: dss.Text.Command(f"Edit Fault.{name} enabled=no")
+
+
+def _run_batch(batch):
+    node_zone, k = _state["node_zone"], _state["k"]
+    cols = {c: [] for c in ("bus", "zone", "fault_type", "fault_r_ohm", "load_mult", "converged", "iterations",
+                            "solve_ms", "fault_current_a", "min_vpu", "mean_vpu", "sag_nodes", "source_kw",
+                            "losses_kw")}
+    zone_min = []
+    for bus, ftype, r, level, phases, zone in batch:
+        _restore()
+        dss.Solution.LoadMult(level)
+        revert = _apply(bus, ftype, r, phases)
+        t0 = time.perf_counter()
+        try:
+            dss.Solution.Solve()
+        except Exception:
+            pass
+        solve_ms = (time.perf_counter() - t0) * 1e3
+
+        current = float("nan")
+        if ftype != "LINE_OPEN":
+            dss.Circuit.SetActiveElement(f"Fault.{_FAULTS[ftype]}")
+            current = max(dss.CktElement.CurrentsMagAng()[::2])
+        v = np.asarray(dss.Circuit.AllBusMagPu(), dtype=float)
+        # Nodes outside the zoned line graph (source, transformer secondaries) land in slot k
+        zmin = np.full(k + 1, np.inf)
+        np.minimum.at(zmin, node_zone, v)
+        row = (bus, zone, ftype, r, level, dss.Solution.Converged(), dss.Solution.Iterations(), solve_ms, current,
+               v.min(), v.mean(), int((v < SAG_PU).sum()), -dss.Circuit.TotalPower()[0],
+               dss.Circuit.Losses()[0] / 1e3)
+        revert()
+
+        for c, val in zip(cols, row):
+            cols[c].append(val)
+        zone_min.append(zmin[:k])
+
+    zone_min = np.vstack(zone_min)
+    for z in range(k):
+        cols[f"zone{z + 1}_min_vpu"] = zone_min[:, z]
+    return cols
+
+
+def _batches(items, size):
+    it = iter(items)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
+
+
+def run(out_path="fault_dataset.parquet", workers=None, batch_size=64, k=7, report_every=5.0, **grid):
+    bus_map, edges, labels, pos = cached_topology(dss_path, coords_path, k=k, random_state=42)
+    compile_model()
+    nodes = node_voltages()
+    lines = line_table()
+
+    zone_of = {b: int(labels[i]) for b, i in bus_map.items()}
+    node_zone = [zone_of.get(b, k) for b in nodes["bus"]]
+    bus_phases = {b: sorted(p for p in g["phase"] if p > 0) for b, g in nodes.groupby("bus", sort=False)
+                  if b in zone_of}
+    feeders = dict(zip(lines.loc[lines["enabled"], "to_bus"], lines.loc[lines["enabled"], "name"]))
+
+    scenarios = [(b, f, r, lvl, bus_phases[b], zone_of[b] + 1)
+                 for b, f, r, lvl in fault_scenarios(bus_phases, feeders, **grid)]
+    total = len(scenarios)
+    workers = workers or os.cpu_count()
+    print(f"{total} scenarios on {workers} workers -> {out_path}", flush=True)
+
+    done, start, last = 0, time.perf_counter(), 0.0
+    writer = None
+    with Pool(workers, initializer=_init_worker, initargs=(dss_path, node_zone, k, feeders)) as pool:
+        try:
+            for cols in pool.imap_unordered(_run_batch, _batches(scenarios, batch_size)):
+                table = pa.Table.from_pydict(cols)
+                if writer is None:
+                    writer = pq.ParquetWriter(out_path, table.schema)
+                writer.write_table(table)
+                done += table.num_rows
+                elapsed = time.perf_counter() - start
+                if elapsed - last >= report_every or done == total:
+                    last = elapsed
+                    rate = done / elapsed
+                    print(f"{done}/{total} ({done / total:.0%}) | {rate:.0f} scenarios/s | "
+                          f"ETA {(total - done) / rate:.0f}s", flush=True)
+        finally:
+            if writer is not None:
+                writer.close()
+    return out_path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Zone-wise fault injection on the IEEE 123 bus feeder")
+    parser.add_argument("--out", default="fault_dataset.parquet")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--batch-size", type=int, default=64)
+    args = parser.parse_args()
+    run(args.out, workers=args.workers, batch_size=args.batch_size)
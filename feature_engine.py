@@ -0,0 +1,142 @@
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+WINDOW = 24
+BASE_FEATURES = ["Wind_Speed_kmph", "Rainfall_mm", "Pressure_hPa", "Voltage_V", "Load_MW", "Past_Outages_Count"]
+FEATURES = ["Load_per_Voltage", "Pressure_Deviation"]
+MODEL_FEATURES = BASE_FEATURES + FEATURES
+WINDOW_FEATURES = ["Wind_Speed_Max", "Rainfall_Max", "Recent_Outages"]
+TIME = "Timestamp"
+OUTAGE = "Outage"
+
+# FEATURES depend on the event alone (Pressure_Deviation is taken against the training-set mean), so they are
+# safe on Weather_Grid_Data.xlsx, whose rows have no timestamp and no meaningful order. WINDOW_FEATURES cover
+# the last `window` events in TIME order and stay out of MODEL_FEATURES until the data has a TIME column:
+# over file order they are noise, and they leak rows across a random train/test split. Recent_Outages counts
+# per-event OUTAGE flags (0/1), never the already cumulative Past_Outages_Count or the Blackout_Risk label.
+# Sums are kept as prefix sums in both paths, so batch and streaming perform the same operations and agree exactly
+
+
+def _window_sums(values, window):
+    # Sum of each value and the window - 1 before it, as a difference of prefix sums
+    n = len(values)
+    prefix = np.cumsum(values)
+    before = np.concatenate([np.zeros(min(window, n), dtype=prefix.dtype), prefix[:max(n - window, 0)]])
+    return prefix - before
+
+
+def batch_features(df, window=WINDOW, windowed=False):
+    if windowed:
+        missing = [c for c in (TIME, OUTAGE) if c not in df]
+        if missing:
+            raise ValueError(f"Window features need the {', '.join(missing)} column(s) to order and count events")
+        df = df.sort_values(TIME, kind="stable")
+    else:
+        df = df.copy()
+    df["Load_per_Voltage"] = df["Load_MW"] / df["Voltage_V"]
+    pressure = df["Pressure_hPa"].to_numpy(dtype=np.float64)
+    df["Pressure_Deviation"] = pressure - pressure.mean()
+    if not windowed:
+        return df
+
+    n = len(df)
+    for src, dst in (("Wind_Speed_kmph", "Wind_Speed_Max"), ("Rainfall_mm", "Rainfall_Max")):
+        padded = np.concatenate([np.full(window - 1, -np.inf), df[src].to_numpy(dtype=np.float64)])
+        df[dst] = sliding_window_view(padded, window).max(axis=1) if n else np.zeros(0)
+    df["Recent_Outages"] = _window_sums(df[OUTAGE].fillna(0).to_numpy(dtype=np.int64), window)
+    return df
+
+
+class RollingMax:
+    # Monotonic deque in a preallocated ring: O(1) amortized per value
+    def __init__(self, window):
+        self.window = window
+        self.values = [0.0] * window
+        self.ids = [0] * window
+        self.head = self.size = self.t = 0
+
+    def push(self, x):
+        w = self.window
+        while self.size and self.ids[self.head] <= self.t - w:
+            self.head = (self.head + 1) % w
+            self.size -= 1
+        while self.size and self.values[(self.head + self.size - 1) % w] <= x:
+            self.size -= 1
+        slot = (self.head + self.size) % w
+        self.values[slot], self.ids[slot] = x, self.t
+        self.size += 1
+        self.t += 1
+        return self.values[self.head]
+
+
+class RollingSum:
+    # Prefix sums of the last `window` values in a preallocated ring; the window sum is one subtraction
+    def __init__(self, window, zero=0.0):
+        self.window = window
+        self.ring = [zero] * window
+        self.prefix = zero
+        self.t = 0
+
+    def push(self, x):
+        slot = self.t % self.window
+        before = self.ring[slot]
+        self.prefix = self.prefix + x
+        self.ring[slot] = self.prefix
+        self.t += 1
+        return self.prefix - before
+
+
+class FeatureEngine:
+    # The batch_features columns one event at a time, in O(1) per event. `pressure_mean` is the mean
+    # Pressure_hPa of the training data; windowed events must arrive in TIME order and carry OUTAGE
+    def __init__(self, pressure_mean, window=WINDOW, windowed=False):
+        self.pressure_mean = np.float64(pressure_mean)
+        self.window, self.windowed = window, windowed
+        self.wind = RollingMax(window)
+        self.rain = RollingMax(window)
+        self.outages = RollingSum(window, zero=0)
+
+    def update(self, event):
+        # `event` holds the BASE_FEATURES; returns it with FEATURES (and WINDOW_FEATURES if windowed) added
+        out = dict(event)
+        out["Load_per_Voltage"] = np.float64(event["Load_MW"]) / np.float64(event["Voltage_V"])
+        out["Pressure_Deviation"] = np.float64(event["Pressure_hPa"]) - self.pressure_mean
+        if self.windowed:
+            out["Wind_Speed_Max"] = self.wind.push(np.float64(event["Wind_Speed_kmph"]))
+            out["Rainfall_Max"] = self.rain.push(np.float64(event["Rainfall_mm"]))
+            outage = event[OUTAGE]
+            out["Recent_Outages"] = self.outages.push(0 if pd.isna(outage) else int(outage))
+        return out
+
+
+if __name__ == "__main__":
+    import argparse
+    import time
+    from dataset_cache import load
+
+    parser = argparse.ArgumentParser(description="Check streaming features against the batch computation")
+    parser.add_argument("--window", type=int, default=WINDOW)
+    args = parser.parse_args()
+
+    df = load("weather")
+    windowed = TIME in df and OUTAGE in df
+    names = FEATURES + (WINDOW_FEATURES if windowed else [])
+    if windowed:
+        df = df.sort_values(TIME, kind="stable")
+    else:
+        print(f"No {TIME}/{OUTAGE} columns: checking {', '.join(FEATURES)} only")
+    t0 = time.perf_counter()
+    batch = batch_features(df, args.window, windowed=windowed)
+    batch_s = time.perf_counter() - t0
+
+    engine = FeatureEngine(df["Pressure_hPa"].to_numpy(dtype=np.float64).mean(), args.window, windowed=windowed)
+    events = df[BASE_FEATURES + ([OUTAGE] if windowed else [])].to_dict("records")
+    t0 = time.perf_counter()
+    stream = pd.DataFrame([engine.update(e) for e in events])
+    stream_s = time.perf_counter() - t0
+
+    for name in names:
+        same = np.array_equal(batch[name].to_numpy(dtype=np.float64), stream[name].to_numpy(dtype=np.float64))
+        print(f"{name:20s} {'identical' if same else 'MISMATCH'}")
+    print(f"batch {len(df) / batch_s:,.0f} rows/s | streaming {stream_s / max(len(df), 1) * 1e6:.1f} us/event")
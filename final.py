@@ -3,10 +3,8 @@ import pandas as pd
 import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
-import networkx as nx
-from sklearn.cluster import SpectralClustering
 from scipy.spatial import ConvexHull
-from opendssdirect import dss
+from topology_cache import cached_topology
 import os
 
 st.set_page_config(page_title="IEEE 123 Bus Dashboard", layout="wide")
@@ -22,47 +20,7 @@ if not os.path.exists(dss_path) or not os.path.exists(coords_path):
 
 @st.cache_resource
 def load_data():
-    dss.Basic.ClearAll()
-    dss.Text.Command(f'Redirect "{dss_path}"')
-    dss.Text.Command("Solve")
-
-    coords = pd.read_csv(coords_path, sep=r"[,\s]+", names=["Bus", "X", "Y"], index_col="Bus", engine="python")
-    bus_map, edges, idx = {}, [], 0
-
-    ptr = dss.Lines.First()
-    while ptr:
-        b1, b2 = dss.Lines.Bus1().split('.')[0], dss.Lines.Bus2().split('.')[0]
-        for b in (b1, b2):
-            if b not in bus_map:
-                bus_map[b] = idx
-                idx += 1
-        r = dss.Lines.R1()
-        if r > 0:
-            edges.append((bus_map[b1], bus_map[b2], 1.0 / r))
-        ptr = dss.Lines.Next()
-
-    n = len(bus_map)
-    W = np.zeros((n, n))
-    for u, v, w in edges:
-        W[u, v] = W[v, u] = w
-
-    labels = SpectralClustering(n_clusters=7, affinity="precomputed", random_state=42).fit_predict(W)
-
-    pos = {}
-    for bus, i in bus_map.items():
-        if bus in coords.index:
-            pos[i] = (coords.at[bus, "X"], coords.at[bus, "Y"])
-
-    
-    if len(pos) < len(bus_map):
-        G = nx.Graph()
-        G.add_edges_from([(u, v) for u, v, _ in edges])
-        fallback = nx.spring_layout(G, seed=42)
-        for i in range(n):
-            if i not in pos:
-                pos[i] = fallback[i]
-
-    return bus_map, edges, labels, pos
+    return cached_topology(dss_path, coords_path, k=7, random_state=42)
 
 bus_map, edges, labels, pos = load_data()
 n = len(bus_map)
@@ -0,0 +1,113 @@
+import numpy as np
+import pandas as pd
+import networkx as nx
+import scipy.sparse as sp
+from scipy.optimize import linear_sum_assignment
+from sklearn.cluster import k_means
+from sklearn.manifold import spectral_embedding as _sk_embedding
+from sklearn.utils import check_random_state
+from opendssdirect import dss
+from dss_extract import line_graph, line_table
+
+# R1 that Lines.R1 reports for LineCode lines; the zone IDs the dashboards hardcode were read off these weights
+REFERENCE_R1 = 0.058
+
+
+def build_adjacency(edges, n):
+    # Symmetric weighted adjacency in CSR; a repeated bus pair keeps its last weight
+    if not edges:
+        return sp.csr_matrix((n, n))
+    u, v, w = (np.asarray(c) for c in zip(*edges))
+    keep = u != v
+    u, v, w = u[keep].astype(np.int64), v[keep].astype(np.int64), w[keep].astype(float)
+    lo, hi = np.minimum(u, v), np.maximum(u, v)
+    _, last = np.unique((lo * n + hi)[::-1], return_index=True)
+    last = len(lo) - 1 - last
+    lo, hi, w = lo[last], hi[last], w[last]
+    rows = np.concatenate([lo, hi])
+    cols = np.concatenate([hi, lo])
+    return sp.csr_matrix((np.concatenate([w, w]), (rows, cols)), shape=(n, n))
+
+
+def normalized_laplacian(W):
+    W = sp.csr_matrix(W, dtype=float, copy=True)
+    W.setdiag(0)
+    W.eliminate_zeros()
+    dd = np.sqrt(np.asarray(W.sum(axis=1)).ravel())
+    dd[dd == 0] = 1.0
+    d_inv = sp.diags(1.0 / dd)
+    L = sp.identity(W.shape[0], format="csr") - d_inv @ W @ d_inv
+    return L.tocsr(), dd
+
+
+def spectral_embedding(W, k, random_state=None):
+    # sklearn's own embedding on the sparse graph, so zones stay identical to SpectralClustering
+    # (affinity="precomputed") whichever eigsh formulation the installed sklearn uses; the
+    # unscaled eigenvectors are returned too as a warm start for incremental updates
+    _, dd = normalized_laplacian(W)
+    emb = _sk_embedding(W, n_components=k, random_state=check_random_state(random_state), drop_first=False)
+    return emb, emb * dd[:, None]
+
+
+def embed(vecs, dd):
+    emb = vecs.T / dd
+    signs = np.sign(emb[np.arange(emb.shape[0]), np.argmax(np.abs(emb), axis=1)])
+    emb *= signs[:, None]
+    return emb.T
+
+
+def spectral_zones(W, k=7, random_state=42, n_init=10):
+    rng = check_random_state(random_state)
+    emb, _ = spectral_embedding(W, k, random_state=rng)
+    _, labels, _ = k_means(emb, k, random_state=rng, n_init=n_init)
+    return labels
+
+
+def match_zones(new, old, k):
+    # Relabel clusters so each keeps the zone ID it shares the most buses with
+    overlap = np.zeros((k, k), dtype=int)
+    np.add.at(overlap, (new, old), 1)
+    rows, cols = linear_sum_assignment(-overlap)
+    mapping = np.empty(k, dtype=int)
+    mapping[rows] = cols
+    return mapping[new]
+
+
+def reference_lines(lines):
+    # Line table weighted the way the old Lines.R1 walk saw it, for pinning zone IDs
+    lines = lines.copy()
+    lines.loc[lines["linecode"].fillna("").astype(str) != "", "r1"] = REFERENCE_R1
+    return lines
+
+
+def load_topology(dss_path, coords_path, k=7, random_state=42):
+    dss.Basic.ClearAll()
+    dss.Text.Command(f'Redirect "{dss_path}"')
+    dss.Text.Command("Solve")
+
+    coords = pd.read_csv(coords_path, sep=r"[,\s]+", names=["Bus", "X", "Y"], index_col="Bus", engine="python")
+    lines = line_table()
+    bus_map, edges = line_graph(lines)
+
+    n = len(bus_map)
+    W = build_adjacency(edges, n)
+    labels = spectral_zones(W, k=k, random_state=random_state)
+    # Real impedances move the raw cluster IDs; keep each zone on the ID label_remap and fault_zones expect
+    _, ref_edges = line_graph(reference_lines(lines))
+    reference = spectral_zones(build_adjacency(ref_edges, n), k=k, random_state=random_state)
+    labels = match_zones(labels, reference, k)
+
+    pos = {}
+    for bus, i in bus_map.items():
+        if bus in coords.index:
+            pos[i] = (coords.at[bus, "X"], coords.at[bus, "Y"])
+
+    if len(pos) < n:
+        G = nx.Graph()
+        G.add_edges_from([(u, v) for u, v, _ in edges])
+        fallback = nx.spring_layout(G, seed=42)
+        for i in range(n):
+            if i not in pos:
+                pos[i] = fallback[i]
+
+    return bus_map, edges, labels, pos
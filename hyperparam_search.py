@@ -0,0 +1,197 @@
+import argparse
+import hashlib
+import json
+import math
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import KFold, StratifiedKFold
+from dataset_cache import CACHE_DIR, load
+from feature_engine import MODEL_FEATURES, batch_features
+from model_registry import data_hash, save_best_params
+from train_all_models import CLASS_TARGETS, EARLY_STOPPING, REG_TARGETS, load_dataset, target_params
+
+SEARCH_DIR = os.path.join(CACHE_DIR, "search")
+
+# name -> (sampler, bounds); eta and the regularizers are drawn on a log scale
+SPACE = {
+    "max_depth": ("int", 3, 9),
+    "eta": ("log", 0.01, 0.3),
+    "subsample": ("uniform", 0.6, 1.0),
+    "colsample_bytree": ("uniform", 0.5, 1.0),
+    "min_child_weight": ("log", 0.5, 10.0),
+    "lambda": ("log", 0.1, 10.0),
+    "gamma": ("uniform", 0.0, 2.0),
+}
+
+_state = {}
+
+
+def task_data(target):
+    if target == "Blackout_Risk":
+        df = batch_features(load("weather"))
+        features = MODEL_FEATURES
+    elif target in CLASS_TARGETS + REG_TARGETS:
+        df, features, _ = load_dataset("grid")
+    else:
+        raise ValueError(f"Unknown target {target!r}")
+    return df[features].to_numpy(dtype=np.float32), df[target].to_numpy(dtype=np.float32), \
+        data_hash(df[features + [target]])
+
+
+def sample_config(rng):
+    params = {}
+    for name, (kind, lo, hi) in SPACE.items():
+        if kind == "int":
+            params[name] = int(rng.integers(lo, hi + 1))
+        elif kind == "log":
+            params[name] = float(np.exp(rng.uniform(np.log(lo), np.log(hi))))
+        else:
+            params[name] = float(rng.uniform(lo, hi))
+    return params
+
+
+def cached_folds(folder, y, classification, n_folds, seed):
+    # The same folds for every trial and every resume of the search
+    path = os.path.join(folder, "folds.npz")
+    if os.path.exists(path):
+        with np.load(path) as data:
+            if int(data["n_folds"]) == n_folds and int(data["seed"]) == seed and len(data["fold"]) == len(y):
+                return data["fold"]
+    splitter = (StratifiedKFold if classification else KFold)(n_folds, shuffle=True, random_state=seed)
+    fold = np.empty(len(y), dtype=np.int32)
+    for i, (_, valid) in enumerate(splitter.split(np.zeros(len(y)), y)):
+        fold[valid] = i
+    np.savez(path, fold=fold, n_folds=n_folds, seed=seed)
+    return fold
+
+
+def _init_worker(X, y, fold, base, nthread):
+    # Fold DMatrices are built once per worker and reused by every trial it runs
+    _state["base"] = dict(base, nthread=nthread)
+    _state["folds"] = [(xgb.DMatrix(X[fold != k], label=y[fold != k], nthread=nthread),
+                        xgb.DMatrix(X[fold == k], label=y[fold == k], nthread=nthread))
+                       for k in range(int(fold.max()) + 1)]
+
+
+def _run_trial(trial):
+    key, config, rounds = trial
+    params = dict(_state["base"], **config)
+    scores, best = [], []
+    t0 = time.perf_counter()
+    for dtrain, dvalid in _state["folds"]:
+        booster = xgb.train(params, dtrain, rounds, evals=[(dvalid, "valid")],
+                            early_stopping_rounds=EARLY_STOPPING, verbose_eval=False)
+        scores.append(booster.best_score)
+        best.append(booster.best_iteration + 1)
+    return {"key": key, "config": config, "rounds": rounds, "score": float(np.mean(scores)),
+            "best_rounds": int(np.mean(best)), "seconds": time.perf_counter() - t0}
+
+
+def _trial_key(context, config, rounds):
+    # context is everything else a score depends on: data hash, folds and the fixed base parameters
+    return hashlib.sha256(json.dumps([context, config, rounds], sort_keys=True).encode()).hexdigest()[:24]
+
+
+class Search:
+    # Hyperband over SPACE: brackets of successive halving, each rung keeping the best 1/eta of its
+    # configurations and giving them eta times the boosting rounds. Every finished trial is appended to
+    # trials.jsonl, so an interrupted search picks up where it stopped
+    def __init__(self, target, n_folds=5, workers=None, seed=0, search_dir=SEARCH_DIR):
+        self.target, self.seed = target, seed
+        self.folder = os.path.join(search_dir, "".join(c if c.isalnum() else "_" for c in target))
+        os.makedirs(self.folder, exist_ok=True)
+        self.X, self.y, self.digest = task_data(target)
+        classification = target not in REG_TARGETS
+        self.fold = cached_folds(self.folder, self.y, classification, n_folds, seed)
+        self.base = target_params(target, self.y, 1, tuned=False)
+        for name in SPACE:
+            self.base.pop(name, None)
+        self.context = {"data": self.digest, "n_folds": n_folds, "seed": seed, "base": self.base}
+        self.workers = workers or os.cpu_count() or 1
+        self.trials_path = os.path.join(self.folder, "trials.jsonl")
+        self.done = {}
+        if os.path.exists(self.trials_path):
+            with open(self.trials_path) as fh:
+                for line in fh:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        continue  # a line cut short by the interruption
+                    self.done[rec["key"]] = rec
+        self.resumed = len(self.done)
+
+    def _evaluate(self, pool, configs, rounds):
+        trials = [(_trial_key(self.context, c, rounds), c, rounds) for c in configs]
+        pending = [t for t in trials if t[0] not in self.done]
+        with open(self.trials_path, "a") as fh:
+            for rec in pool.imap_unordered(_run_trial, pending):
+                self.done[rec["key"]] = rec
+                fh.write(json.dumps(rec) + "\n")
+                fh.flush()
+        return [self.done[t[0]] for t in trials]
+
+    def halving(self, pool, configs, rounds, eta, rungs):
+        for rung in range(rungs):
+            results = self._evaluate(pool, configs, rounds)
+            best = min(r["score"] for r in results)
+            print(f"  rung {rung}: {len(configs)} configs x {rounds} rounds, best {best:.4g}", flush=True)
+            if rung == rungs - 1:
+                break
+            keep = max(1, len(configs) // eta)
+            configs = [r["config"] for r in sorted(results, key=lambda r: r["score"])[:keep]]
+            rounds = int(round(rounds * eta))
+
+    def run(self, min_rounds=20, max_rounds=600, eta=3, brackets=None):
+        s_max = int(math.floor(math.log(max_rounds / min_rounds, eta) + 1e-9))
+        brackets = range(s_max, -1, -1) if brackets is None else brackets
+        nthread = max(1, (os.cpu_count() or 1) // self.workers)
+        with Pool(self.workers, initializer=_init_worker,
+                  initargs=(self.X, self.y, self.fold, self.base, nthread)) as pool:
+            for s in brackets:
+                n = int(math.ceil((s_max + 1) / (s + 1) * eta ** s))
+                rounds = int(round(max_rounds * eta ** -s))
+                # Configs drawn per bracket from a fixed seed, so a resumed run asks for the same trials
+                rng = np.random.default_rng([self.seed, s])
+                print(f"bracket {s}: {n} configs from {rounds} rounds", flush=True)
+                self.halving(pool, [sample_config(rng) for _ in range(n)], rounds, eta, s + 1)
+
+        best = min((r for r in self.done.values() if r["key"] == _trial_key(self.context, r["config"], r["rounds"])),
+                   key=lambda r: r["score"])
+        return best
+
+    def write_back(self, best):
+        # The rounds early stopping settled on across the folds, not the trial's budget
+        params = dict(best["config"], num_rounds=best["best_rounds"])
+        save_best_params(self.target, params, score=best["score"])
+        return params
+
+
+def sklearn_params(params):
+    # Native xgboost names -> XGBClassifier/XGBRegressor keyword arguments
+    names = {"eta": "learning_rate", "lambda": "reg_lambda", "alpha": "reg_alpha", "num_rounds": "n_estimators"}
+    return {names.get(k, k): v for k, v in params.items()}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Resumable Hyperband search over XGBoost parameters")
+    parser.add_argument("targets", nargs="*", default=["Blackout_Risk"])
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--min-rounds", type=int, default=20)
+    parser.add_argument("--max-rounds", type=int, default=600)
+    parser.add_argument("--eta", type=int, default=3)
+    parser.add_argument("--halving-only", action="store_true", help="run only the widest bracket")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    for target in args.targets:
+        search = Search(target, n_folds=args.folds, workers=args.workers, seed=args.seed)
+        print(f"{target}: {search.resumed} trials restored from {search.trials_path}")
+        t0 = time.perf_counter()
+        s_max = int(math.floor(math.log(args.max_rounds / args.min_rounds, args.eta) + 1e-9))
+        best = search.run(args.min_rounds, args.max_rounds, args.eta, brackets=[s_max] if args.halving_only else None)
+        params = search.write_back(best)
+        print(f"{target}: best CV {best['score']:.4g} in {time.perf_counter() - t0:.1f}s -> {params}")
@@ -0,0 +1,259 @@
+import argparse
+import json
+import os
+import queue
+import socketserver
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import pandas as pd
+import model_registry
+
+# Served endpoint -> registry name
+MODELS = {
+    "fault": "Fault",
+    "recovery_time": "Time_To_Recovery_min",
+    "resilience_score": "Grid Stress Score",
+}
+MAX_BATCH = 256
+MAX_WAIT_MS = 2.0
+QUEUE_SIZE = 1024
+LATENCY_WINDOW = 10000
+
+
+class Overloaded(Exception):
+    pass
+
+
+class Stats:
+    # Latencies of the most recent requests and running totals, for p50/p99 and throughput
+    def __init__(self, window=LATENCY_WINDOW):
+        self.lock = threading.Lock()
+        self.latency = deque(maxlen=window)
+        self.started = time.perf_counter()
+        self.requests = self.rows = self.batches = self.rejected = 0
+
+    def record(self, seconds, rows):
+        with self.lock:
+            self.latency.append(seconds)
+            self.requests += 1
+            self.rows += rows
+
+    def summary(self):
+        with self.lock:
+            lat = np.array(self.latency) * 1e3
+            elapsed = time.perf_counter() - self.started
+            return {
+                "requests": self.requests,
+                "rows": self.rows,
+                "batches": self.batches,
+                "rejected": self.rejected,
+                "rows_per_batch": self.rows / max(self.batches, 1),
+                "p50_ms": float(np.percentile(lat, 50)) if lat.size else None,
+                "p99_ms": float(np.percentile(lat, 99)) if lat.size else None,
+                "requests_per_s": self.requests / elapsed,
+                "rows_per_s": self.rows / elapsed,
+            }
+
+
+class Batcher:
+    # Requests wait in a bounded queue; one thread drains up to max_batch rows (or whatever arrived within
+    # max_wait_ms of the first) and answers them all from a single predict call
+    def __init__(self, model, max_batch=MAX_BATCH, max_wait_ms=MAX_WAIT_MS, queue_size=QUEUE_SIZE):
+        self.model = model
+        self.max_batch, self.max_wait = max_batch, max_wait_ms / 1e3
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.stats = Stats()
+        self.model.model  # load before the first request rather than inside it
+        threading.Thread(target=self._loop, daemon=True).start()
+
+    def refresh(self, registry_dir=model_registry.REGISTRY_DIR):
+        # Swaps in a newer registered version; loaded first, so requests never wait on it
+        latest = model_registry.latest_version(self.model.name, registry_dir)
+        if latest is None or latest == self.model.version:
+            return False
+        entry = model_registry.load(self.model.name, latest, registry_dir)
+        entry.model
+        self.model = entry
+        return True
+
+    def submit(self, X):
+        future = Future()
+        try:
+            self.queue.put_nowait((self.model.matrix(X), future, time.perf_counter()))
+        except queue.Full:
+            with self.stats.lock:
+                self.stats.rejected += 1
+            raise Overloaded(self.model.name) from None
+        return future
+
+    def _loop(self):
+        while True:
+            batch = [self.queue.get()]
+            rows = len(batch[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while rows < self.max_batch:
+                try:
+                    item = self.queue.get(timeout=max(deadline - time.perf_counter(), 0.0))
+                except queue.Empty:
+                    break
+                batch.append(item)
+                rows += len(item[0])
+            self._run(batch)
+
+    def _run(self, batch):
+        model = self.model
+        try:
+            out = model.predict(np.vstack([X for X, _, _ in batch]))
+        except Exception as exc:
+            for _, future, _ in batch:
+                future.set_exception(exc)
+            return
+        with self.stats.lock:
+            self.stats.batches += 1
+        start = 0
+        now = time.perf_counter()
+        for X, future, t0 in batch:
+            future.set_result(out[start:start + len(X)])
+            start += len(X)
+            self.stats.record(now - t0, len(X))
+
+
+def _jsonable(values):
+    values = np.asarray(values)
+    return values.tolist() if values.dtype != object else [str(v) for v in values]
+
+
+class Handler(BaseHTTPRequestHandler):
+    # POST /predict/<model> with {"rows": [{feature: value, ...}, ...]} (or a single row object);
+    # GET /stats and /health
+    protocol_version = "HTTP/1.1"
+    batchers = {}
+    timeout_s = 5.0
+
+    def log_message(self, fmt, *args):
+        pass
+
+    def _reply(self, code, body, headers=()):
+        data = json.dumps(body).encode()
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, val in headers:
+            self.send_header(key, val)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, {m: {"name": b.model.name, "version": b.model.version}
+                              for m, b in self.batchers.items()})
+        elif self.path == "/stats":
+            self._reply(200, {m: b.stats.summary() for m, b in self.batchers.items()})
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        parts = self.path.strip("/").split("/")
+        batcher = self.batchers.get(parts[1]) if len(parts) == 2 and parts[0] == "predict" else None
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        if batcher is None:
+            self._reply(404, {"error": f"unknown model; serving {sorted(self.batchers)}"})
+            return
+        try:
+            payload = json.loads(body)
+            rows = payload.get("rows", payload) if isinstance(payload, dict) else payload
+            X = pd.DataFrame([rows] if isinstance(rows, dict) else rows)
+            missing = [f for f in batcher.model.features if f not in X]
+            if missing:
+                raise KeyError(f"missing features: {missing}")
+            # Values that do not convert to float (e.g. text in a numeric feature) are the client's error
+            X = batcher.model.matrix(X)
+        except (ValueError, KeyError, TypeError, AttributeError) as exc:
+            self._reply(400, {"error": str(exc)})
+            return
+        try:
+            out = batcher.submit(X).result(timeout=self.timeout_s)
+        except Overloaded:
+            self._reply(503, {"error": "queue full"}, headers=[("Retry-After", "1")])
+            return
+        except Exception as exc:
+            self._reply(500, {"error": str(exc)})
+            return
+        self._reply(200, {"model": batcher.model.name, "version": batcher.model.version,
+                          "predictions": _jsonable(out)})
+
+
+class UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def server_bind(self):
+        if os.path.exists(self.server_address):
+            os.remove(self.server_address)
+        super().server_bind()
+
+
+def build_batchers(models=None, registry_dir=model_registry.REGISTRY_DIR, **kwargs):
+    batchers = {}
+    for alias, name in (models or MODELS).items():
+        try:
+            batchers[alias] = Batcher(model_registry.load(name, registry_dir=registry_dir), **kwargs)
+        except FileNotFoundError as exc:
+            print(f"Skipping {alias}: {exc}")
+    return batchers
+
+
+def watch(batchers, registry_dir=model_registry.REGISTRY_DIR, interval=5.0):
+    # Picks up versions published by online_learning.py without stopping the server
+    def loop():
+        while True:
+            time.sleep(interval)
+            for alias, batcher in batchers.items():
+                try:
+                    if batcher.refresh(registry_dir):
+                        print(f"{alias}: now serving v{batcher.model.version}", flush=True)
+                except (OSError, ValueError) as exc:
+                    print(f"{alias}: refresh failed ({exc})", flush=True)
+    threading.Thread(target=loop, daemon=True).start()
+
+
+def make_server(batchers, host="127.0.0.1", port=8600, unix=None):
+    handler = type("GridGuardHandler", (Handler,), {"batchers": batchers})
+    if unix:
+        return UnixHTTPServer(unix, handler)
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Micro-batched GridGuard prediction service")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8600)
+    parser.add_argument("--unix", default=None, help="serve on this Unix socket path instead of TCP")
+    parser.add_argument("--registry", default=model_registry.REGISTRY_DIR)
+    parser.add_argument("--model", action="append", default=[], help="alias=registry name; repeatable")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT_MS)
+    parser.add_argument("--queue-size", type=int, default=QUEUE_SIZE)
+    parser.add_argument("--watch", type=float, default=5.0, help="seconds between registry checks; 0 disables")
+    args = parser.parse_args()
+
+    models = dict(m.split("=", 1) for m in args.model) or None
+    batchers = build_batchers(models, args.registry, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms,
+                              queue_size=args.queue_size)
+    if not batchers:
+        raise SystemExit("No registered models to serve; run train_all_models.py first")
+    if args.watch > 0:
+        watch(batchers, args.registry, args.watch)
+    server = make_server(batchers, args.host, args.port, args.unix)
+    print(f"Serving {sorted(batchers)} on {args.unix or f'http://{args.host}:{args.port}'}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
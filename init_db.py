@@ -1,62 +1,43 @@
-from sqlalchemy import create_engine, text
-import pandas as pd
+import argparse
 import random
 import time
-import os
-db_path = os.path.abspath("grid.db")
-engine = create_engine(f"sqlite:///{db_path}", future=True)
+import event_store
+from event_store import db_path
+engine = event_store.connect(db_path)
 print("init_db writing to:", db_path)
-seed_data = pd.DataFrame({
-    "zone": list(range(1, 8)),
-    "fault_triggered": ["No"] * 7,
-    "load_lost": [0] * 7,
-    "blackout_time": [0.0] * 7,
-    "recovery_time": [0.0] * 7,
-    "power_restored": [100] * 7,
-    "resilience_score": [10.0] * 7
-})
+seed_data = [{"zone": z, "fault_triggered": "No", "load_lost": 0, "blackout_time": 0.0, "recovery_time": 0.0,
+              "power_restored": 100, "resilience_score": 10.0} for z in range(1, 8)]
 
-with engine.begin() as conn:
-    seed_data.to_sql("resilience_data", con=conn, if_exists="replace", index=False)
-def random_update():
-    z = random.randint(1, 7)
+# History is kept across runs; the seed events only go into an empty database
+event_store.create_schema(engine)
+if not event_store.zones(engine):
+    event_store.append(engine, seed_data)
+def random_event(z=None):
+    z = z or random.randint(1, 7)
     fault = "Yes" if random.random() < 0.6 else "No"
     load_lost = random.randint(100, 500) if fault == "Yes" else 0
     blackout = round(random.uniform(1.0, 4.0), 2) if fault == "Yes" else 0.0
     recovery = round(blackout + random.uniform(1.0, 2.0), 2) if fault == "Yes" else 0.0
     restored = max(80, 100 - load_lost // 5)
     score = round(max(0, min(10, 10 - load_lost / 100 - blackout / 5)), 2)
-
-    with engine.begin() as conn:
-        conn.execute(
-            text("""
-                UPDATE resilience_data
-                SET fault_triggered = :fault,
-                    load_lost = :ll,
-                    blackout_time = :bt,
-                    recovery_time = :rt,
-                    power_restored = :pr,
-                    resilience_score = :rs
-                WHERE zone = :z
-            """),
-            {
-                "fault": fault,
-                "ll": load_lost,
-                "bt": blackout,
-                "rt": recovery,
-                "pr": restored,
-                "rs": score,
-                "z": z
-            }
-        )
-
-    print(f"Updated Zone {z} | Fault: {fault} | Load Lost: {load_lost} kW | Score: {score}/10")
+    return {"zone": z, "fault_triggered": fault, "load_lost": load_lost, "blackout_time": blackout,
+            "recovery_time": recovery, "power_restored": restored, "resilience_score": score}
+def random_update(batch=1):
+    events = [random_event() for _ in range(batch)]
+    event_store.append(engine, events)
+    e = events[-1]
+    print(f"Updated Zone {e['zone']} | Fault: {e['fault_triggered']} | Load Lost: {e['load_lost']} kW | "
+          f"Score: {e['resilience_score']}/10" + (f" (+{batch - 1} more)" if batch > 1 else ""))
 if __name__ == "__main__":
-    print(" Simulating real-time updates every 15 seconds")
+    parser = argparse.ArgumentParser(description="Simulate zone events into the resilience event table")
+    parser.add_argument("--interval", type=float, default=15.0)
+    parser.add_argument("--batch", type=int, default=1, help="events appended per interval")
+    args = parser.parse_args()
+
+    print(f" Simulating real-time updates every {args.interval:g} seconds")
     try:
         while True:
-            random_update()
-            time.sleep(15)
+            random_update(args.batch)
+            time.sleep(args.interval)
     except KeyboardInterrupt:
         print(" Stopped")
-
@@ -0,0 +1,219 @@
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+import time
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+
+REGISTRY_DIR = os.environ.get("GRIDGUARD_MODEL_DIR",
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), "models"))
+
+# XGBoost models as UBJSON boosters; anything else (RandomForest, ...) through joblib with raw numpy
+# buffers, which joblib can memory-map on load
+_FILES = {"xgboost": "model.ubj", "sklearn": "model.joblib"}
+BEST_PARAMS = "best_params.json"
+
+
+def slug(name):
+    return "".join(c if c.isalnum() else "_" for c in name).strip("_")
+
+
+def data_hash(df):
+    # Content hash of a training frame, independent of its index
+    rows = pd.util.hash_pandas_object(df, index=False).to_numpy()
+    h = hashlib.sha256(rows.tobytes())
+    h.update(json.dumps([str(c) for c in df.columns]).encode())
+    return h.hexdigest()
+
+
+def _versions(model_dir):
+    if not os.path.isdir(model_dir):
+        return []
+    return sorted(int(d[1:]) for d in os.listdir(model_dir) if d[:1] == "v" and d[1:].isdigit())
+
+
+def list_versions(name, registry_dir=REGISTRY_DIR):
+    return _versions(os.path.join(registry_dir, slug(name)))
+
+
+def latest_version(name, registry_dir=REGISTRY_DIR):
+    path = os.path.join(registry_dir, slug(name), "LATEST")
+    try:
+        with open(path) as fh:
+            return int(fh.read().strip())
+    except (OSError, ValueError):
+        versions = list_versions(name, registry_dir)
+        return versions[-1] if versions else None
+
+
+def _write_model(model, folder):
+    if hasattr(model, "get_booster"):
+        model = model.get_booster()
+    if isinstance(model, xgb.Booster):
+        # An early-stopped booster still holds the rounds after its best one, which every reader (raw(),
+        # tree_export, continued training) would otherwise use; only the rounds up to the best are kept
+        best = model.attr("best_iteration")
+        if best is not None and int(best) + 1 < model.num_boosted_rounds():
+            model = model[: int(best) + 1]
+        model.save_model(os.path.join(folder, _FILES["xgboost"]))
+        return "xgboost"
+    joblib.dump(model, os.path.join(folder, _FILES["sklearn"]), compress=0)
+    return "sklearn"
+
+
+def register(name, model, features, encoders=None, data_hash=None, metrics=None, params=None, task=None,
+             classes=None, extra=None, registry_dir=REGISTRY_DIR):
+    # Writes the artifact into a scratch folder and renames it to the next free vN, so readers never see
+    # a half-written version; returns that version
+    model_dir = os.path.join(registry_dir, slug(name))
+    os.makedirs(model_dir, exist_ok=True)
+    tmp = tempfile.mkdtemp(dir=model_dir, prefix=".tmp")
+    try:
+        kind = _write_model(model, tmp)
+        meta = {
+            "name": name,
+            "kind": kind,
+            "task": task,
+            "features": list(features),
+            "encoders": encoders or {},
+            "classes": classes,
+            "data_hash": data_hash,
+            "metrics": metrics or {},
+            "params": params or {},
+            "extra": extra or {},
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        while True:
+            version = (_versions(model_dir) or [0])[-1] + 1
+            meta["version"] = version
+            with open(os.path.join(tmp, "meta.json"), "w") as fh:
+                json.dump(meta, fh, indent=1, default=float)
+            try:
+                os.rename(tmp, os.path.join(model_dir, f"v{version}"))
+                break
+            except OSError:
+                if not os.path.isdir(os.path.join(model_dir, f"v{version}")):
+                    raise
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    fd, latest = tempfile.mkstemp(dir=model_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        fh.write(str(version))
+    os.replace(latest, os.path.join(model_dir, "LATEST"))
+    return version
+
+
+def prune(name, keep=10, registry_dir=REGISTRY_DIR):
+    # Drops all but the newest `keep` versions; the one LATEST points at is always kept
+    model_dir = os.path.join(registry_dir, slug(name))
+    latest = latest_version(name, registry_dir)
+    for version in _versions(model_dir)[:-keep] if keep > 0 else []:
+        if version != latest:
+            shutil.rmtree(os.path.join(model_dir, f"v{version}"), ignore_errors=True)
+
+
+def best_params(name, registry_dir=REGISTRY_DIR):
+    # Tuned parameters for `name` (native xgboost names, plus num_rounds), or {} if never tuned
+    try:
+        with open(os.path.join(registry_dir, BEST_PARAMS)) as fh:
+            return json.load(fh).get(name, {}).get("params", {})
+    except (OSError, ValueError):
+        return {}
+
+
+def save_best_params(name, params, score=None, registry_dir=REGISTRY_DIR):
+    path = os.path.join(registry_dir, BEST_PARAMS)
+    try:
+        with open(path) as fh:
+            table = json.load(fh)
+    except (OSError, ValueError):
+        table = {}
+    table[name] = {"params": params, "cv_score": score, "updated": time.strftime("%Y-%m-%dT%H:%M:%S")}
+    os.makedirs(registry_dir, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=registry_dir, suffix=".tmp")
+    with os.fdopen(fd, "w") as fh:
+        json.dump(table, fh, indent=1, default=float)
+    os.replace(tmp, path)
+
+
+class RegisteredModel:
+    # Metadata is read up front; the model itself only when first used
+    def __init__(self, folder):
+        self.folder = folder
+        with open(os.path.join(folder, "meta.json")) as fh:
+            self.meta = json.load(fh)
+        self._model = None
+
+    @property
+    def name(self):
+        return self.meta["name"]
+
+    @property
+    def version(self):
+        return self.meta["version"]
+
+    @property
+    def features(self):
+        return self.meta["features"]
+
+    @property
+    def encoders(self):
+        return self.meta["encoders"]
+
+    @property
+    def model(self):
+        if self._model is None:
+            path = os.path.join(self.folder, _FILES[self.meta["kind"]])
+            if self.meta["kind"] == "xgboost":
+                self._model = xgb.Booster(model_file=path)
+            else:
+                self._model = joblib.load(path, mmap_mode="r")
+        return self._model
+
+    def matrix(self, X):
+        # Encoded, float32 feature matrix in training column order
+        if isinstance(X, pd.DataFrame):
+            X = X.copy()
+            for col, classes in self.encoders.items():
+                if col in X:
+                    codes = pd.Categorical(X[col].astype(str), categories=classes).codes.astype(np.float32)
+                    codes[codes < 0] = np.nan
+                    X[col] = codes
+            X = X[self.features].to_numpy(dtype=np.float32)
+        return np.atleast_2d(np.asarray(X, dtype=np.float32))
+
+    def raw(self, X):
+        # Scores as trained: class probabilities for classifiers, values for regressors
+        X = self.matrix(X)
+        if self.meta["kind"] == "xgboost":
+            return self.model.inplace_predict(X)
+        if self.meta["task"] == "classification":
+            return self.model.predict_proba(X)
+        return self.model.predict(X)
+
+    def predict(self, X):
+        out = self.raw(X)
+        if self.meta["task"] != "classification":
+            return out
+        if out.ndim > 1:
+            codes = out.argmax(axis=1)
+        else:
+            codes = (out > 0.5).astype(int)
+        if self.meta["kind"] == "sklearn":
+            return np.asarray(self.model.classes_)[codes]
+        if self.meta.get("classes"):
+            return np.asarray(self.meta["classes"], dtype=object)[codes]
+        return codes
+
+
+def load(name, version=None, registry_dir=REGISTRY_DIR):
+    version = version or latest_version(name, registry_dir)
+    if version is None:
+        raise FileNotFoundError(f"No registered versions of {name!r} in {registry_dir}")
+    return RegisteredModel(os.path.join(registry_dir, slug(name), f"v{version}"))
@@ -0,0 +1,188 @@
+import argparse
+import time
+from collections import deque
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sqlalchemy import text
+import model_registry
+from event_store import EVENTS, connect, db_path
+from train_all_models import EARLY_STOPPING, PARAMS, encode
+
+ENCODERS = {"fault_triggered": ["No", "Yes"]}
+# Registry name -> (label column, feature columns) of the zone records init_db.py writes
+ONLINE_MODELS = {
+    "zone_recovery_time": ("recovery_time", ["zone", "fault_triggered", "load_lost", "blackout_time"]),
+    "zone_resilience_score": ("resilience_score", ["zone", "fault_triggered", "load_lost", "blackout_time",
+                                                    "power_restored"]),
+}
+PSI_BINS = 10
+PSI_LIMIT = 0.25
+ERROR_RATIO_LIMIT = 1.5
+ROUNDS_PER_BATCH = 10
+FULL_ROUNDS = 200
+VALID_SHARE = 0.2
+MAX_ROUNDS = 1000
+KEEP_VERSIONS = 20
+
+
+class TableSource:
+    # New labeled zone records: the events appended since the last poll, followed by an id high-water mark
+    def __init__(self, engine, table=EVENTS, since=0, limit=10000):
+        self.engine, self.table, self.limit = engine, table, limit
+        self.last_id = since
+
+    def poll(self):
+        with self.engine.connect() as conn:
+            df = pd.read_sql(text(f"SELECT * FROM {self.table} WHERE id > :last ORDER BY id LIMIT :limit"), conn,
+                             params={"last": self.last_id, "limit": self.limit})
+        if len(df):
+            self.last_id = int(df["id"].iloc[-1])
+        return df
+
+
+def reference_bins(X, bins=PSI_BINS):
+    # Quantile edges and the share of reference rows in each bin, per feature
+    ref = {}
+    for j in range(X.shape[1]):
+        edges = np.unique(np.nanquantile(X[:, j], np.linspace(0, 1, bins + 1)[1:-1]))
+        counts = np.bincount(np.searchsorted(edges, X[:, j], side="right"), minlength=len(edges) + 1)
+        ref[j] = {"edges": edges.tolist(), "share": (counts / max(len(X), 1)).tolist()}
+    return ref
+
+
+def psi(reference, X, eps=1e-4):
+    # Population stability index of each feature of X against the reference bins
+    out = []
+    for j in range(X.shape[1]):
+        edges, share = np.asarray(reference[j]["edges"]), np.asarray(reference[j]["share"])
+        counts = np.bincount(np.searchsorted(edges, X[:, j], side="right"), minlength=len(share))
+        p, q = np.clip(counts / max(len(X), 1), eps, None), np.clip(share, eps, None)
+        out.append(float(np.sum((p - q) * np.log(p / q))))
+    return np.array(out)
+
+
+class OnlineLearner:
+    # Keeps a registered model current from micro-batches of new records: a few more boosting rounds on each
+    # batch (or, with mode="refresh", the existing trees' leaf values re-fit to the recent window), and a full
+    # retrain on the window only once feature drift or error growth crosses its limit. Each published version
+    # records the last event id it has seen, which is where a restarted learner resumes
+    def __init__(self, name, mode="boost", window=5000, registry_dir=model_registry.REGISTRY_DIR):
+        self.name, self.mode, self.registry_dir = name, mode, registry_dir
+        self.target, self.features = ONLINE_MODELS[name]
+        self.window = deque(maxlen=window)
+        self.params = dict(PARAMS, objective="reg:squarederror", eval_metric="rmse", nthread=1, seed=42,
+                           **model_registry.best_params(name, registry_dir))
+        self.params.pop("num_rounds", None)
+        self.entry = None
+        if model_registry.latest_version(name, registry_dir) is not None:
+            self.entry = model_registry.load(name, registry_dir=registry_dir)
+        self.last_id = self.entry.meta["extra"].get("last_id", 0) if self.entry is not None else 0
+        self.updates = self.retrains = 0
+
+    def _xy(self, df):
+        df = encode(df, ENCODERS)
+        return df[self.features].to_numpy(dtype=np.float32), df[self.target].to_numpy(dtype=np.float32)
+
+    def _publish(self, booster, X, y, how, drift, valid_rmse=None):
+        # A retrain brings new reference bins and its validation RMSE as the error baseline; updates keep both
+        pred = booster.inplace_predict(X)
+        rmse = float(np.sqrt(np.mean((pred - y) ** 2)))
+        metrics = {"rmse": rmse, "rows": len(y)}
+        if how == "retrain":
+            extra = {"reference": {str(k): v for k, v in reference_bins(X).items()}, "rmse": valid_rmse}
+            metrics["valid_rmse"] = valid_rmse
+        else:
+            extra = {"reference": self.entry.meta["extra"]["reference"], "rmse": self.entry.meta["extra"]["rmse"]}
+        extra.update(update=how, drift=drift, last_id=self.last_id)
+        digest = model_registry.data_hash(pd.DataFrame(np.column_stack([X, y])))
+        version = model_registry.register(self.name, booster, self.features, encoders=ENCODERS, data_hash=digest,
+                                          metrics=metrics, params=self.params,
+                                          task="regression", extra=extra, registry_dir=self.registry_dir)
+        model_registry.prune(self.name, KEEP_VERSIONS, self.registry_dir)
+        self.entry = model_registry.load(self.name, version, self.registry_dir)
+        return version
+
+    def drift(self, X, y):
+        extra = self.entry.meta["extra"]
+        reference = {int(k): v for k, v in extra["reference"].items()}
+        err = float(np.sqrt(np.mean((self.entry.model.inplace_predict(X) - y) ** 2)))
+        return {"psi_max": float(psi(reference, X).max()),
+                "error_ratio": err / max(extra["rmse"], 1e-9)}
+
+    def retrain(self, drift=None):
+        # The newest VALID_SHARE of the window is held out: early stopping watches it, and its RMSE is the
+        # out-of-sample baseline drift() compares new batches with. Too small a window to split trains on all
+        X, y = self._xy(pd.DataFrame(list(self.window)))
+        n_valid = int(round(len(y) * VALID_SHARE))
+        cut = len(y) - n_valid if n_valid else len(y)
+        X_valid, y_valid = (X[cut:], y[cut:]) if n_valid else (X, y)
+        dvalid = xgb.DMatrix(X_valid, label=y_valid)
+        booster = xgb.train(self.params, xgb.DMatrix(X[:cut], label=y[:cut]), FULL_ROUNDS, evals=[(dvalid, "valid")],
+                            early_stopping_rounds=EARLY_STOPPING, verbose_eval=False)
+        booster = booster[: booster.best_iteration + 1]
+        valid_rmse = float(np.sqrt(np.mean((booster.inplace_predict(X_valid) - y_valid) ** 2)))
+        self.retrains += 1
+        return self._publish(booster, X[:cut], y[:cut], "retrain", drift, valid_rmse)
+
+    def update(self, batch):
+        # One micro-batch of new records; returns (version, how) of what was published
+        self.window.extend(batch.to_dict("records"))
+        if "id" in batch and len(batch):
+            self.last_id = max(self.last_id, int(batch["id"].max()))
+        if self.entry is None:
+            return self.retrain(), "retrain"
+        X, y = self._xy(batch)
+        drift = self.drift(X, y)
+        booster = self.entry.model
+        if (drift["psi_max"] > PSI_LIMIT or drift["error_ratio"] > ERROR_RATIO_LIMIT
+                or booster.num_boosted_rounds() + ROUNDS_PER_BATCH > MAX_ROUNDS):
+            return self.retrain(drift), "retrain"
+
+        if self.mode == "refresh":
+            # Same trees, leaf values re-fit to the recent window
+            X, y = self._xy(pd.DataFrame(list(self.window)))
+            params = dict(self.params, process_type="update", updater="refresh", refresh_leaf=True)
+            booster = xgb.train(params, xgb.DMatrix(X, label=y), booster.num_boosted_rounds(), xgb_model=booster)
+        else:
+            booster = xgb.train(self.params, xgb.DMatrix(X, label=y), ROUNDS_PER_BATCH, xgb_model=booster)
+        self.updates += 1
+        return self._publish(booster, X, y, self.mode, drift), self.mode
+
+
+def run(names, engine, mode="boost", batch_size=64, max_wait=60.0, poll_every=1.0):
+    # Collects records until a batch is full (or max_wait passes) and feeds it to every learner, starting
+    # after the oldest event id any of them has published
+    learners = [OnlineLearner(name, mode) for name in names]
+    source = TableSource(engine, since=min(learner.last_id for learner in learners))
+    pending, started = [], time.monotonic()
+    while True:
+        new = source.poll()
+        if len(new):
+            pending.append(new)
+        rows = sum(len(p) for p in pending)
+        if rows and (rows >= batch_size or time.monotonic() - started >= max_wait):
+            batch = pd.concat(pending, ignore_index=True)
+            for learner in learners:
+                t0 = time.perf_counter()
+                version, how = learner.update(batch)
+                print(f"{learner.name}: {how} on {len(batch)} records -> v{version} "
+                      f"({time.perf_counter() - t0:.2f}s)", flush=True)
+            pending, started = [], time.monotonic()
+        time.sleep(poll_every)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Keep the zone models current from new database records")
+    parser.add_argument("names", nargs="*", default=sorted(ONLINE_MODELS))
+    parser.add_argument("--mode", choices=("boost", "refresh"), default="boost")
+    parser.add_argument("--batch-size", type=int, default=64)
+    parser.add_argument("--max-wait", type=float, default=60.0, help="seconds before a partial batch is used")
+    parser.add_argument("--db", default=db_path)
+    args = parser.parse_args()
+
+    engine = connect(args.db)
+    try:
+        run(args.names, engine, args.mode, args.batch_size, args.max_wait)
+    except KeyboardInterrupt:
+        print(" Stopped")
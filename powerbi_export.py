@@ -0,0 +1,134 @@
+import argparse
+import json
+import os
+import time
+from datetime import datetime, timezone
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+from sqlalchemy import text
+import event_store
+
+EXPORT_DIR = os.environ.get("GRIDGUARD_EXPORT_DIR",
+                            os.path.join(os.path.dirname(os.path.abspath(__file__)), "Power BI", "export"))
+MANIFEST = "manifest.jsonl"
+STATE = "state.json"
+CHUNK_ROWS = 200000
+ROLLUP_EXPORTS = ("1d", "1mo")
+
+# Layout under EXPORT_DIR, for Power BI's folder connector:
+#   events/date=YYYY-MM-DD/zone=Z/part-<first id>.<fmt>   new events only, never rewritten
+#   rollup_1d/month=YYYY-MM/data.<fmt>, rollup_1mo/...     months touched by new events, rewritten
+#   predictions/model=<name>/version=<n>/data.<fmt>        written by the training scripts
+# manifest.jsonl gets one line per file written (the last line for a path wins), so a refresh only needs
+# the partitions listed after the time it last ran. state.json holds the event id already exported and the
+# months whose rollups still have to be rewritten for those events
+
+
+def _now():
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+def _write(df, path, fmt):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    if fmt == "parquet":
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), tmp)
+    else:
+        df.to_csv(tmp, index=False)
+    os.replace(tmp, path)
+
+
+class Exporter:
+    def __init__(self, export_dir=EXPORT_DIR, fmt="parquet"):
+        self.dir, self.fmt = export_dir, fmt
+        os.makedirs(export_dir, exist_ok=True)
+        self.state = {}
+        if os.path.exists(os.path.join(export_dir, STATE)):
+            with open(os.path.join(export_dir, STATE)) as fh:
+                self.state = json.load(fh)
+
+    def save_state(self):
+        path = os.path.join(self.dir, STATE)
+        with open(path + ".tmp", "w") as fh:
+            json.dump(self.state, fh, indent=2)
+        os.replace(path + ".tmp", path)
+
+    def write_partition(self, dataset, partition, df, part="data"):
+        # Writing the same partition and part again replaces the file, which keeps re-runs idempotent
+        rel = "/".join([dataset] + [f"{k}={v}" for k, v in partition.items()] + [f"{part}.{self.fmt}"])
+        _write(df, os.path.join(self.dir, *rel.split("/")), self.fmt)
+        entry = {"dataset": dataset, "path": rel, "partition": partition, "rows": len(df), "written": _now()}
+        with open(os.path.join(self.dir, MANIFEST), "a") as fh:
+            fh.write(json.dumps(entry) + "\n")
+        return entry
+
+    def export_events(self, engine, chunk_rows=CHUNK_ROWS):
+        # Events after the exported id, a chunk at a time. Files are named after the chunk's first id and the
+        # state is saved after each chunk, so a run cut short rewrites the same files when it is repeated. The
+        # chunk's months are saved with the id: they stay pending until their rollups have been written
+        last, written = self.state.get("events_last_id", 0), 0
+        months = set(self.state.get("pending_months", []))
+        while True:
+            with engine.connect() as conn:
+                df = pd.read_sql(text(f"SELECT * FROM {event_store.EVENTS} WHERE id > :last ORDER BY id LIMIT :n"),
+                                 conn, params={"last": last, "n": chunk_rows})
+            if not len(df):
+                break
+            first = int(df["id"].iloc[0])
+            ts = pd.to_datetime(df["ts"], unit="s", utc=True)
+            for (date, zone), part in df.groupby([ts.dt.strftime("%Y-%m-%d"), "zone"], sort=False):
+                self.write_partition("events", {"date": date, "zone": int(zone)}, part, f"part-{first:020d}")
+            months.update(ts.dt.strftime("%Y-%m").unique())
+            last = int(df["id"].iloc[-1])
+            written += len(df)
+            self.state["events_last_id"] = last
+            self.state["pending_months"] = sorted(months)
+            self.save_state()
+            if len(df) < chunk_rows:
+                break
+        return written, months
+
+    def export_rollups(self, engine, months):
+        # Rollup rows are totals that keep changing, so each touched month is written out whole
+        for grain in ROLLUP_EXPORTS:
+            for month in sorted(months):
+                start = pd.Timestamp(f"{month}-01", tz="UTC")
+                end = start + pd.offsets.MonthBegin(1)
+                with engine.connect() as conn:
+                    df = pd.read_sql(text(f"SELECT * FROM {event_store.rollup_table(grain)} "
+                                          "WHERE bucket >= :start AND bucket < :end ORDER BY bucket, zone"),
+                                     conn, params={"start": int(start.timestamp()), "end": int(end.timestamp())})
+                self.write_partition(f"rollup_{grain}", {"month": month}, df)
+
+    def run(self, engine):
+        # Months pending from a run that stopped before its rollups are rewritten along with the new ones
+        written, months = self.export_events(engine)
+        self.export_rollups(engine, months)
+        if self.state.pop("pending_months", None) is not None:
+            self.save_state()
+        return written, months
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export new resilience events and rollups for Power BI")
+    parser.add_argument("--db", default=event_store.db_path)
+    parser.add_argument("--dir", default=EXPORT_DIR)
+    parser.add_argument("--format", choices=("parquet", "csv"), default="parquet")
+    parser.add_argument("--every", type=float, default=0, help="repeat every N seconds (0: run once)")
+    args = parser.parse_args()
+
+    engine = event_store.connect(args.db)
+    event_store.create_schema(engine)
+    exporter = Exporter(args.dir, args.format)
+    try:
+        while True:
+            t0 = time.perf_counter()
+            written, months = exporter.run(engine)
+            print(f"Exported {written} events, rewrote {len(months)} month(s) of rollups "
+                  f"({time.perf_counter() - t0:.2f}s) -> {args.dir}", flush=True)
+            if not args.every:
+                break
+            time.sleep(args.every)
+    except KeyboardInterrupt:
+        print(" Stopped")
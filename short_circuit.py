@@ -0,0 +1,172 @@
+import argparse
+import time
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+from scipy.sparse.linalg import splu
+from opendssdirect import dss
+from dss_snapshot import BaseCase
+from fault_injection import apply_fault, compile_model, define_fault_elements, dss_path
+
+SCREEN_TYPES = ("SLG", "LL", "LLG", "3PH")
+BOLTED_OHM = 0.0001
+SAG_PU = 0.9
+
+
+def _fault_admittance(ftype, r):
+    g = 1.0 / r
+    return {
+        "SLG": g * np.eye(1),
+        "LL": g * np.array([[1.0, -1.0], [-1.0, 1.0]]),
+        "LLG": g * np.eye(2),
+        "3PH": g * np.eye(3),
+    }[ftype]
+
+
+def system_model():
+    # Y in YNodeOrder, pre-fault node voltages and per-node voltage bases from the solved base case
+    try:
+        Y = sp.csc_matrix(dss.YMatrix.getYsparse(), dtype=complex)
+    except AttributeError:
+        y = np.asarray(dss.Circuit.SystemY(), dtype=float)
+        n = int(round(np.sqrt(y.size // 2)))
+        Y = sp.csc_matrix((y[0::2] + 1j * y[1::2]).reshape(n, n))
+    names = [s.lower() for s in dss.Circuit.YNodeOrder()]
+    v = np.asarray(dss.Circuit.YNodeVArray(), dtype=float)
+    V0 = v[0::2] + 1j * v[1::2]
+
+    vpu = dict(zip((s.lower() for s in dss.Circuit.AllNodeNames()), dss.Circuit.AllBusMagPu()))
+    pu = np.array([vpu.get(s, 0.0) for s in names])
+    vbase = np.full(len(names), np.nan)
+    vbase[pu > 0] = np.abs(V0[pu > 0]) / pu[pu > 0]
+
+    parts = [s.split(".", 1) for s in names]
+    nodes = pd.DataFrame({"bus": [p[0] for p in parts], "phase": [int(p[1]) if len(p) > 1 else 0 for p in parts]})
+    return Y, V0, vbase, nodes
+
+
+def fault_cases(nodes, fault_types=SCREEN_TYPES):
+    # SLG on every node; LL/LLG/3PH on the first phases of each bus, as fault_injection applies them
+    need = {"SLG": 1, "LL": 2, "LLG": 2, "3PH": 3}
+    cases = []
+    for bus, g in nodes.groupby("bus", sort=False):
+        g = g[g["phase"] > 0].sort_values("phase")
+        idx, phases = g.index.to_numpy(), g["phase"].tolist()
+        for ftype in fault_types:
+            if ftype == "SLG":
+                cases += [(bus, ftype, (p,), (i,)) for p, i in zip(phases, idx)]
+            elif len(phases) >= need[ftype]:
+                m = need[ftype]
+                cases.append((bus, ftype, tuple(phases[:m]), tuple(idx[:m])))
+    return cases
+
+
+def screen(resistances=(BOLTED_OHM,), fault_types=SCREEN_TYPES, chunk=128, sag_pu=SAG_PU):
+    Y, V0, vbase, nodes = system_model()
+    lu = splu(Y)
+    n = Y.shape[0]
+    cases = fault_cases(nodes, fault_types)
+    energized = np.isfinite(vbase)
+    out = []
+
+    # Columns of Z = Y^-1 are solved a chunk of fault buses at a time and dropped after use
+    order = sorted(range(len(cases)), key=lambda c: cases[c][3][0])
+    for start in range(0, len(order), chunk):
+        block = [cases[c] for c in order[start:start + chunk]]
+        cols = np.unique(np.concatenate([c[3] for c in block]))
+        local = {g: j for j, g in enumerate(cols)}
+        E = np.zeros((n, len(cols)), dtype=complex)
+        E[cols, np.arange(len(cols))] = 1.0
+        Zc = lu.solve(E)
+
+        for ftype in fault_types:
+            group = [c for c in block if c[1] == ftype]
+            if not group:
+                continue
+            idx = np.array([c[3] for c in group])
+            loc = np.vectorize(local.get)(idx)
+            Zbb = Zc[idx[:, :, None], loc[:, None, :]]
+            Vb = V0[idx]
+            m = idx.shape[1]
+            for r in resistances:
+                Yf = _fault_admittance(ftype, r)
+                A = np.eye(m) + Yf @ Zbb
+                If = np.linalg.solve(A, (Yf @ Vb[:, :, None]))[..., 0]
+                V = V0[None, :] - np.einsum("nbm,bm->bn", Zc[:, loc], If)
+                vpu = np.abs(V[:, energized]) / vbase[energized]
+                for (bus, _, phases, _), z, i_f, vmin, sags in zip(
+                        group, np.abs(np.diagonal(Zbb, axis1=1, axis2=2)).mean(axis=1), np.abs(If).max(axis=1),
+                        vpu.min(axis=1), (vpu < sag_pu).sum(axis=1)):
+                    out.append((bus, ftype, ".".join(map(str, phases)), r, z, i_f, vmin, int(sags)))
+
+    return pd.DataFrame(out, columns=["bus", "fault_type", "phases", "fault_r_ohm", "z_th_ohm", "fault_current_a",
+                                      "min_vpu", "sag_nodes"])
+
+
+def solve_cases(cases, sag_pu=SAG_PU):
+    # Per-fault OpenDSS solves with controls frozen, i.e. on the same network the Y matrix describes. The
+    # caller's control mode is put back afterwards
+    base = BaseCase()
+    mode = dss.Solution.ControlMode()
+    dss.Text.Command("Set ControlMode=OFF")
+    rows = []
+    try:
+        for bus, ftype, phases, r in cases:
+            base.restore()
+            name = apply_fault(bus, ftype, r, [int(p) for p in str(phases).split(".")])
+            dss.Solution.Solve()
+            dss.Circuit.SetActiveElement(f"Fault.{name}")
+            current = max(dss.CktElement.CurrentsMagAng()[::2])
+            v = np.asarray(dss.Circuit.AllBusMagPu(), dtype=float)
+            v = v[v > 0]
+            rows.append((current, v.min(), int((v < sag_pu).sum())))
+            dss.Text.Command(f"Edit Fault.{name} enabled=no")
+    finally:
+        dss.Solution.ControlMode(mode)
+    return pd.DataFrame(rows, columns=["dss_fault_current_a", "dss_min_vpu", "dss_sag_nodes"])
+
+
+def confirm(results, top=20, by="fault_current_a"):
+    worst = results.nlargest(top, by).reset_index(drop=True)
+    dss_res = solve_cases(worst[["bus", "fault_type", "phases", "fault_r_ohm"]].itertuples(index=False))
+    return pd.concat([worst, dss_res], axis=1)
+
+
+def validate(results, sample=200, seed=0):
+    picked = results.sample(min(sample, len(results)), random_state=seed).reset_index(drop=True)
+    t0 = time.perf_counter()
+    both = pd.concat([picked, solve_cases(picked[["bus", "fault_type", "phases", "fault_r_ohm"]]
+                                          .itertuples(index=False))], axis=1)
+    elapsed = time.perf_counter() - t0
+    current_err = (both["fault_current_a"] - both["dss_fault_current_a"]).abs() / both["dss_fault_current_a"]
+    vmin_err = (both["min_vpu"] - both["dss_min_vpu"]).abs()
+    return both, {
+        "cases": len(both),
+        "current_rel_err_mean": current_err.mean(),
+        "current_rel_err_max": current_err.max(),
+        "min_vpu_abs_err_mean": vmin_err.mean(),
+        "min_vpu_abs_err_max": vmin_err.max(),
+        "dss_seconds_per_case": elapsed / max(len(both), 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batched short-circuit screening from the system Y matrix")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("--validate", type=int, default=0, help="number of random cases to check against OpenDSS")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    compile_model(dss_path)
+    define_fault_elements()
+    t0 = time.perf_counter()
+    results = screen(resistances=(BOLTED_OHM, 1.0, 10.0))
+    print(f"Screened {len(results)} faults in {time.perf_counter() - t0:.2f}s")
+    if args.out:
+        results.to_csv(args.out, index=False)
+
+    print(confirm(results, top=args.top).to_string())
+    if args.validate:
+        _, stats = validate(results, sample=args.validate)
+        for key, val in stats.items():
+            print(f"{key}: {val:.4g}" if isinstance(val, float) else f"{key}: {val}")
@@ -1,11 +1,9 @@
 import streamlit as st
 import pandas as pd
-import numpy as np
 import matplotlib.pyplot as plt
 import plotly.express as px
 import networkx as nx
-from sklearn.cluster import SpectralClustering
-from opendssdirect import dss
+from topology_cache import cached_topology
 import os
 import plotly.express as px
 
@@ -24,41 +22,9 @@ if not os.path.exists(dss_path) or not os.path.exists(coords_path):
     st.error("Required files not found. Ensure IEEE123Master.dss and BusCoords.dat are under C:\\IEEE123Bus")
 else:
     try:
-        dss.Basic.ClearAll()
-        dss.Text.Command(f'Redirect "{dss_path}"')
-        dss.Text.Command("Solve")
-        coords = pd.read_csv(coords_path, sep=r"[,\s]+", names=["Bus", "X", "Y"], index_col="Bus", engine="python")
-        bus_map, edges, idx = {}, [], 0
-        ptr = dss.Lines.First()
-        while ptr:
-            b1 = dss.Lines.Bus1().split('.')[0]
-            b2 = dss.Lines.Bus2().split('.')[0]
-            for b in (b1, b2):
-                if b not in bus_map:
-                    bus_map[b] = idx; idx += 1
-            r = dss.Lines.R1()
-            if r > 0:
-                edges.append((bus_map[b1], bus_map[b2], 1.0 / r))
-            ptr = dss.Lines.Next()
-        n = len(bus_map)
-        W = np.zeros((n, n))
-        for u, v, w in edges:
-            W[u, v] = W[v, u] = w
-
         k = 7
-        clustering = SpectralClustering(n_clusters=k, affinity='precomputed', random_state=42)
-        labels = clustering.fit_predict(W)
-        pos = {}
-        for bus, i in bus_map.items():
-            if bus in coords.index:
-                pos[i] = (coords.at[bus, "X"], coords.at[bus, "Y"])
-        missing = [i for i in range(n) if i not in pos]
-        if missing:
-            tmpG = nx.Graph()
-            tmpG.add_edges_from([(u, v) for u, v, _ in edges])
-            fallback = nx.spring_layout(tmpG, seed=42)
-            for i in missing:
-                pos[i] = fallback[i]
+        bus_map, edges, labels, pos = cached_topology(dss_path, coords_path, k=k, random_state=42)
+        n = len(bus_map)
         fault_zones = {4, 5, 6}
         zone_data = []
         zone_metrics = {}
@@ -0,0 +1,210 @@
+import argparse
+import json
+import os
+import time
+from multiprocessing import Pool
+import numpy as np
+import scipy.sparse as sp
+from opendssdirect import dss
+from fault_injection import compile_model, dss_path, folder_path
+
+load_path = os.path.join(folder_path, "PaperLoadShape.txt")
+pv_path = os.path.join(folder_path, "PV5sdata1.csv")
+
+OUTPUTS = ("vpu", "line_p_kw", "line_q_kvar", "losses_kw", "source_kw", "taps", "load_mult", "pv_kw")
+
+
+class Profile:
+    # A sampled shape, interpolated onto any time grid and repeated past its end
+    def __init__(self, values, interval_s, scale=1.0):
+        self.values = np.asarray(values, dtype=float) * scale
+        self.interval_s = float(interval_s)
+
+    @classmethod
+    def from_file(cls, path, interval_s, scale=1.0, normalize=False):
+        values = np.loadtxt(path, delimiter=",", usecols=0, ndmin=1)
+        if normalize:
+            values = values / values.max()
+        return cls(values, interval_s, scale)
+
+    def at(self, t_s):
+        x = np.asarray(t_s, dtype=float) / self.interval_s
+        return np.interp(x, np.arange(len(self.values)), self.values, period=len(self.values))
+
+
+def line_flow_operator():
+    # Sparse map from YNodeVArray to each line's terminal-1 conductor currents, from the line YPrims,
+    # so every step's flows come out of one bulk voltage read and one sparse mat-vec
+    node_index = {s.lower(): i for i, s in enumerate(dss.Circuit.YNodeOrder())}
+    rows, cols, vals, term, owner, names = [], [], [], [], [], []
+    r = 0
+    ptr = dss.Lines.First()
+    while ptr:
+        names.append(dss.Lines.Name())
+        nc = dss.CktElement.NumConductors()
+        y = np.asarray(dss.CktElement.YPrim(), dtype=float)
+        Y = (y[0::2] + 1j * y[1::2]).reshape(2 * nc, 2 * nc)
+        buses = [b.split(".")[0].lower() for b in dss.CktElement.BusNames()]
+        order = dss.CktElement.NodeOrder()
+        idx = [node_index.get(f"{buses[c // nc]}.{node}", -1) if node else -1 for c, node in enumerate(order)]
+        for j in range(nc):
+            for c in range(2 * nc):
+                if idx[c] >= 0 and Y[j, c] != 0:
+                    rows.append(r)
+                    cols.append(idx[c])
+                    vals.append(Y[j, c])
+            term.append(idx[j])
+            owner.append(len(names) - 1)
+            r += 1
+        ptr = dss.Lines.Next()
+
+    n = len(node_index)
+    A = sp.csr_matrix((vals, (rows, cols)), shape=(r, n), dtype=complex)
+    G = sp.csr_matrix((np.ones(r), (owner, np.arange(r))), shape=(len(names), r))
+    return A, np.array(term), G, names
+
+
+def _reg_names():
+    names = []
+    ptr = dss.RegControls.First()
+    while ptr:
+        names.append(dss.RegControls.Name())
+        ptr = dss.RegControls.Next()
+    return names
+
+
+def _taps(regs):
+    out = np.empty(len(regs), dtype=np.int16)
+    for i, name in enumerate(regs):
+        dss.RegControls.Name(name)
+        out[i] = dss.RegControls.TapNumber()
+    return out
+
+
+def _set_taps(regs, taps):
+    for name, tap in zip(regs, taps):
+        dss.RegControls.Name(name)
+        dss.RegControls.TapNumber(int(tap))
+
+
+def _write_json(path, data):
+    tmp = path + ".tmp"
+    with open(tmp, "w") as fh:
+        json.dump(data, fh)
+    os.replace(tmp, path)
+
+
+def run_window(start, stop, out_dir, step_s=60.0, load=None, pv=None, pv_bus="450", chunk=1440, warmup=60,
+               path=dss_path):
+    # Steps [start, stop) of the study; resumes from checkpoint.json when the window was interrupted
+    wdir = os.path.join(out_dir, f"window_{start:08d}_{stop:08d}")
+    os.makedirs(wdir, exist_ok=True)
+    ckpt_path = os.path.join(wdir, "checkpoint.json")
+    ckpt = None
+    if os.path.exists(ckpt_path):
+        with open(ckpt_path) as fh:
+            ckpt = json.load(fh)
+        if ckpt["next_step"] >= stop - start:
+            return wdir
+
+    compile_model(path)
+    if pv is not None:
+        dss.Text.Command(f"New Generator.pv Bus1={pv_bus} kV=4.16 kW=0 PF=1")
+    dss.Solution.Solve()
+    A, term, G, lines = line_flow_operator()
+    regs = _reg_names()
+    nodes = dss.Circuit.AllNodeNames()
+    n_steps = stop - start
+
+    t = (start + np.arange(n_steps)) * step_s
+    load_mult = load.at(t) if load is not None else np.ones(n_steps)
+    pv_kw = pv.at(t) if pv is not None else np.zeros(n_steps)
+    shapes = {
+        "vpu": (len(nodes),), "line_p_kw": (len(lines),), "line_q_kvar": (len(lines),), "losses_kw": (),
+        "source_kw": (), "taps": (len(regs),), "load_mult": (), "pv_kw": (),
+    }
+    dtypes = {"taps": np.int16}
+    mode = "r+" if ckpt else "w+"
+    out = {k: np.lib.format.open_memmap(os.path.join(wdir, f"{k}.npy"), mode=mode,
+                                        dtype=dtypes.get(k, np.float32), shape=(n_steps,) + s)
+           for k, s in shapes.items()}
+    buf = {k: np.empty((chunk,) + s, dtype=dtypes.get(k, np.float32)) for k, s in shapes.items()}
+
+    if ckpt:
+        first = ckpt["next_step"]
+        _set_taps(regs, ckpt["taps"])
+    else:
+        first = 0
+        _write_json(os.path.join(wdir, "meta.json"), {
+            "start": start, "stop": stop, "step_s": step_s, "nodes": nodes, "lines": lines, "regulators": regs})
+        # Let regulators settle on the conditions just before the window
+        for tw in (start - np.arange(warmup, 0, -1)) * step_s:
+            dss.Solution.LoadMult(float(load.at(tw)) if load is not None else 1.0)
+            if pv is not None:
+                dss.Generators.Name("pv")
+                dss.Generators.kW(float(pv.at(tw)))
+            dss.Solution.Solve()
+
+    j = 0
+    for i in range(first, n_steps):
+        dss.Solution.LoadMult(float(load_mult[i]))
+        if pv is not None:
+            dss.Generators.Name("pv")
+            dss.Generators.kW(float(pv_kw[i]))
+        dss.Solution.Solve()
+
+        v = np.asarray(dss.Circuit.YNodeVArray(), dtype=float)
+        V = v[0::2] + 1j * v[1::2]
+        S = np.where(term >= 0, V[term], 0) * np.conj(A @ V)
+        flow = G @ S / 1e3
+        buf["vpu"][j] = dss.Circuit.AllBusMagPu()
+        buf["line_p_kw"][j] = flow.real
+        buf["line_q_kvar"][j] = flow.imag
+        buf["losses_kw"][j] = dss.Circuit.Losses()[0] / 1e3
+        buf["source_kw"][j] = -dss.Circuit.TotalPower()[0]
+        buf["taps"][j] = _taps(regs)
+        buf["load_mult"][j] = load_mult[i]
+        buf["pv_kw"][j] = pv_kw[i]
+        j += 1
+
+        if j == chunk or i == n_steps - 1:
+            lo = i + 1 - j
+            for k in OUTPUTS:
+                out[k][lo:i + 1] = buf[k][:j]
+                out[k].flush()
+            _write_json(ckpt_path, {"next_step": i + 1, "taps": buf["taps"][j - 1].tolist()})
+            j = 0
+    return wdir
+
+
+def run_windows(n_steps, out_dir, windows=None, workers=None, **kwargs):
+    workers = workers or os.cpu_count()
+    windows = windows or workers
+    bounds = np.linspace(0, n_steps, windows + 1).astype(int)
+    jobs = [(int(a), int(b), out_dir) for a, b in zip(bounds[:-1], bounds[1:]) if b > a]
+    with Pool(min(workers, len(jobs))) as pool:
+        return pool.starmap(_run_job, [(job, kwargs) for job in jobs])
+
+
+def _run_job(job, kwargs):
+    return run_window(*job, **kwargs)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Quasi-static time-series run of the IEEE 123 bus feeder")
+    parser.add_argument("--out", default="qsts_output")
+    parser.add_argument("--step", type=float, default=60.0, help="seconds per step")
+    parser.add_argument("--hours", type=float, default=8760.0)
+    parser.add_argument("--windows", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--pv-kw", type=float, default=2000.0, help="0 disables the PV generator")
+    parser.add_argument("--pv-interval", type=float, default=5.0, help="seconds between PV5sdata1.csv samples")
+    args = parser.parse_args()
+
+    load = Profile.from_file(load_path, 3600.0)
+    pv = Profile.from_file(pv_path, args.pv_interval, scale=args.pv_kw, normalize=True) if args.pv_kw else None
+    n_steps = int(args.hours * 3600 / args.step)
+    t0 = time.perf_counter()
+    dirs = run_windows(n_steps, args.out, windows=args.windows, workers=args.workers, step_s=args.step,
+                       load=load, pv=pv)
+    print(f"{n_steps} steps in {len(dirs)} windows, {time.perf_counter() - t0:.1f}s -> {args.out}")
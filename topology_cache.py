@@ -0,0 +1,123 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import numpy as np
+from grid_topology import load_topology
+
+CACHE_VERSION = 3
+CACHE_DIR = os.environ.get("GRIDGUARD_CACHE_DIR",
+                           os.path.join(os.path.dirname(os.path.abspath(__file__)), ".cache"))
+
+# DSS commands that pull another file into the model
+_INCLUDE = re.compile(r"^\s*(redirect|compile|buscoords|latlongcoords)\s+(\S.*)$", re.IGNORECASE)
+_QUOTES = {'"': '"', "'": "'", "(": ")", "[": "]", "{": "}"}
+
+
+def _argument(rest):
+    rest = rest.strip()
+    close = _QUOTES.get(rest[0])
+    if close:
+        end = rest.find(close, 1)
+        return rest[1:end] if end > 0 else rest[1:]
+    return rest.split()[0]
+
+
+def _resolve(folder, name):
+    path = os.path.normpath(os.path.join(folder, name))
+    if os.path.exists(path):
+        return path
+    # OpenDSS file names are case-insensitive (Redirect IEEELinecodes.DSS -> IEEELineCodes.DSS)
+    head, tail = os.path.split(path)
+    if os.path.isdir(head):
+        for f in os.listdir(head):
+            if f.lower() == tail.lower():
+                return os.path.join(head, f)
+    return path
+
+
+def model_files(dss_path):
+    files, stack = [], [os.path.abspath(dss_path)]
+    while stack:
+        path = stack.pop()
+        if path in files:
+            continue
+        files.append(path)
+        if not os.path.isfile(path):
+            continue
+        folder = os.path.dirname(path)
+        found = []
+        with open(path, errors="ignore") as fh:
+            for line in fh:
+                m = _INCLUDE.match(line.split("!")[0].split("//")[0])
+                if m:
+                    found.append(_resolve(folder, _argument(m.group(2))))
+        stack.extend(reversed(found))
+    return files
+
+
+def model_hash(dss_path, coords_path=None, **params):
+    root = os.path.dirname(os.path.abspath(dss_path))
+    files = model_files(dss_path)
+    if coords_path and os.path.abspath(coords_path) not in files:
+        files.append(os.path.abspath(coords_path))
+
+    h = hashlib.sha256()
+    h.update(json.dumps({"version": CACHE_VERSION, **params}, sort_keys=True).encode())
+    for path in files:
+        try:
+            name = os.path.relpath(path, root)
+        except ValueError:
+            name = path
+        h.update(name.lower().encode() + b"\0")
+        if not os.path.isfile(path):
+            h.update(b"<missing>\0")
+            continue
+        with open(path, "rb") as fh:
+            for chunk in iter(lambda: fh.read(1 << 20), b""):
+                h.update(chunk)
+        h.update(b"\0")
+    return h.hexdigest()
+
+
+def _save(path, bus_map, edges, labels, pos):
+    buses = sorted(bus_map, key=bus_map.get)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh,
+                     buses=np.array(buses, dtype=str),
+                     edges=np.array(edges, dtype=float).reshape(-1, 3),
+                     labels=np.asarray(labels),
+                     pos=np.array([pos[i] for i in range(len(buses))], dtype=float).reshape(-1, 2))
+        os.replace(tmp, path)
+    except BaseException:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+def _load(path):
+    with np.load(path, allow_pickle=False) as data:
+        buses = data["buses"].tolist()
+        edges = [(int(u), int(v), float(w)) for u, v, w in data["edges"].tolist()]
+        labels = data["labels"]
+        pos = {i: (x, y) for i, (x, y) in enumerate(data["pos"].tolist())}
+    bus_map = {b: i for i, b in enumerate(buses)}
+    return bus_map, edges, labels, pos
+
+
+def cached_topology(dss_path, coords_path, k=7, random_state=42, cache_dir=CACHE_DIR):
+    key = model_hash(dss_path, coords_path, k=k, random_state=random_state)
+    path = os.path.join(cache_dir, f"topology_{key[:32]}.npz")
+    if os.path.exists(path):
+        try:
+            return _load(path)
+        except (OSError, ValueError, KeyError):
+            pass
+
+    result = load_topology(dss_path, coords_path, k=k, random_state=random_state)
+    _save(path, *result)
+    return result
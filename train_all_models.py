@@ -1,54 +1,138 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
 import pandas as pd
-from sklearn.model_selection import train_test_split
-from sklearn.preprocessing import LabelEncoder
-from xgboost import XGBClassifier, XGBRegressor
+import xgboost as xgb
 from sklearn.metrics import accuracy_score, mean_squared_error
+from sklearn.model_selection import train_test_split
+from dataset_cache import load
+from model_registry import REGISTRY_DIR, best_params, data_hash, register
+
+CLASS_TARGETS = ["Weather Risk Level"]
+REG_TARGETS = ["Time_To_Recovery_min", "Microgrid_Survival_hr", "Grid Stress Score", "AI Confidence (%)"]
+ID_COLUMNS = ["Fault ID", "Fault_Location"]
+
+PARAMS = {"max_depth": 5, "eta": 0.05, "subsample": 0.8, "colsample_bytree": 0.8, "max_bin": 256}
+NUM_ROUNDS = 200
+EARLY_STOPPING = 10
+
+
+def fit_encoders(df):
+    # Sorted classes per text column, i.e. the codes LabelEncoder assigned
+    return {col: sorted(df[col].astype(str).unique()) for col in df.select_dtypes(include=["object", "category"])}
+
+
+def encode(df, encoders):
+    # Categories unseen at training time become NaN, which the trees route as missing
+    df = df.copy()
+    for col, classes in encoders.items():
+        if col in df:
+            codes = pd.Categorical(df[col].astype(str), categories=classes).codes.astype(float)
+            codes[codes < 0] = np.nan
+            df[col] = codes
+    return df
+
+
+def decode(col, codes, encoders):
+    classes = np.asarray(encoders[col], dtype=object)
+    return classes[np.asarray(codes, dtype=int)]
+
+
+def load_dataset(name="grid"):
+    df = load(name)
+    encoders = fit_encoders(df)
+    df = encode(df, encoders)
+    features = [c for c in df.columns if c not in CLASS_TARGETS + REG_TARGETS + ID_COLUMNS]
+    return df, features, encoders
+
+
+def target_params(target, y, nthread, tuned=True, registry_dir=REGISTRY_DIR):
+    # Defaults, overridden by whatever hyperparam_search wrote back for this target
+    params = dict(PARAMS, nthread=nthread, seed=42)
+    if tuned:
+        params.update(best_params(target, registry_dir))
+    if target in REG_TARGETS:
+        return dict(params, objective="reg:squarederror", eval_metric="rmse")
+    n_classes = int(np.nanmax(y)) + 1
+    if n_classes > 2:
+        return dict(params, objective="multi:softprob", num_class=n_classes, eval_metric="mlogloss")
+    return dict(params, objective="binary:logistic", eval_metric="logloss")
+
+
+def _fit(target, split, cuts, nthread, registry_dir=REGISTRY_DIR):
+    X_tr, X_te, y_tr, y_te = split
+    # Each target binds its own label, but quantizes against the shared cuts instead of re-sketching; the
+    # eval matrix must reference the training matrix itself, which carries those same cuts
+    dtrain = xgb.QuantileDMatrix(X_tr, label=y_tr[target], ref=cuts, nthread=nthread)
+    dtest = xgb.QuantileDMatrix(X_te, label=y_te[target], ref=dtrain, nthread=nthread)
+    params = target_params(target, np.concatenate([y_tr[target], y_te[target]]), nthread, registry_dir=registry_dir)
+    rounds = params.pop("num_rounds", NUM_ROUNDS)
+    t0 = time.perf_counter()
+    booster = xgb.train(params, dtrain, rounds, evals=[(dtest, "test")],
+                        early_stopping_rounds=EARLY_STOPPING, verbose_eval=False)
+    pred = booster.predict(dtest, iteration_range=(0, booster.best_iteration + 1))
+    if target in REG_TARGETS:
+        metrics = {"mse": float(mean_squared_error(y_te[target], pred))}
+    else:
+        pred = pred.argmax(axis=1) if pred.ndim > 1 else (pred > 0.5).astype(int)
+        metrics = {"accuracy": float(accuracy_score(y_te[target], pred))}
+    metrics["best_iteration"] = booster.best_iteration
+    return target, booster, metrics, time.perf_counter() - t0
+
+
+def train_all(df, features, targets=None, n_jobs=None, test_size=0.2, random_state=42, registry_dir=REGISTRY_DIR):
+    # One split and one set of quantile cuts for every target; fits run side by side on a core budget
+    targets = targets or CLASS_TARGETS + REG_TARGETS
+    n_jobs = n_jobs or os.cpu_count() or 1
+    workers = max(1, min(len(targets), n_jobs))
+    nthread = max(1, n_jobs // workers)
+
+    X = df[features].to_numpy(dtype=np.float32)
+    X_tr, X_te, y_tr, y_te = train_test_split(X, df[targets], test_size=test_size, random_state=random_state)
+    cuts = xgb.QuantileDMatrix(X_tr, max_bin=PARAMS["max_bin"], nthread=n_jobs)
+    split = (X_tr, X_te, y_tr, y_te)
+
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        done = list(pool.map(lambda t: _fit(t, split, cuts, nthread, registry_dir), targets))
+    models = {t: b for t, b, _, _ in done}
+    results = {t: s for t, _, s, _ in done}
+    seconds = {t: s for t, _, _, s in done}
+    return models, results, seconds
+
+
+def save(models, results, df, features, encoders, registry_dir=REGISTRY_DIR):
+    # One registry entry per target, all tagged with the same training data hash
+    digest = data_hash(df[features + list(models)])
+    feature_encoders = {c: v for c, v in encoders.items() if c in features}
+    versions = {}
+    for target, booster in models.items():
+        classification = target in CLASS_TARGETS
+        params = {**PARAMS, "num_rounds": NUM_ROUNDS, **best_params(target, registry_dir)}
+        versions[target] = register(target, booster, features, encoders=feature_encoders, data_hash=digest,
+                                    metrics=results[target], params=params,
+                                    task="classification" if classification else "regression",
+                                    classes=encoders.get(target) if classification else None,
+                                    registry_dir=registry_dir)
+    return versions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train every GridGuard target from one encoded dataset")
+    parser.add_argument("--data", default="grid", help="dataset name in dataset_cache.SOURCES")
+    parser.add_argument("--jobs", type=int, default=None, help="core budget shared by all fits")
+    parser.add_argument("--registry", default=REGISTRY_DIR)
+    args = parser.parse_args()
+
+    df, features, encoders = load_dataset(args.data)
+    t0 = time.perf_counter()
+    models, results, seconds = train_all(df, features, n_jobs=args.jobs, registry_dir=args.registry)
+    elapsed = time.perf_counter() - t0
+    versions = save(models, results, df, features, encoders, args.registry)
 
-file = r"D:\GridGuard\Codes\RealTime_GridDataset_500.xlsx"
-df = pd.read_excel(file)
-
-class_targets = ["Weather Risk Level"]
-reg_targets = ["Time_To_Recovery_min", "Microgrid_Survival_hr", "Grid Stress Score", "AI Confidence (%)"]
-
-for col in df.select_dtypes(include='object'):
-    df[col] = LabelEncoder().fit_transform(df[col].astype(str))
-
-X = df.drop(columns=class_targets + reg_targets + ["Fault ID", "Fault_Location"])
-results = {}
-
-for t in class_targets:
-    y = df[t]
-    n_classes = y.nunique()
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
-    mdl = XGBClassifier(
-        objective="multi:softmax" if n_classes > 2 else "binary:logistic",
-        num_class=n_classes if n_classes > 2 else None,
-        eval_metric="mlogloss" if n_classes > 2 else "logloss",
-        n_estimators=200,
-        max_depth=5,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        early_stopping_rounds=10
-    )
-    mdl.fit(X_tr, y_tr, eval_set=[(X_te, y_te)], verbose=False)
-    results[t] = f"Accuracy: {accuracy_score(y_te, mdl.predict(X_te)):.2f}"
-
-for t in reg_targets:
-    y = df[t]
-    X_tr, X_te, y_tr, y_te = train_test_split(X, y, test_size=0.2, random_state=42)
-    mdl = XGBRegressor(
-        n_estimators=200,
-        max_depth=5,
-        learning_rate=0.05,
-        subsample=0.8,
-        colsample_bytree=0.8,
-        eval_metric="rmse",
-        early_stopping_rounds=10
-    )
-    mdl.fit(X_tr, y_tr, eval_set=[(X_te, y_te)], verbose=False)
-    results[t] = f"MSE: {mean_squared_error(y_te, mdl.predict(X_te)):.2f}"
-
-print("\nModel Performance Summary:")
-for target, score in results.items():
-    print(f"- {target}: {score}")
+    print("\nModel Performance Summary:")
+    for target, metrics in results.items():
+        score = f"Accuracy: {metrics['accuracy']:.2f}" if "accuracy" in metrics else f"MSE: {metrics['mse']:.2f}"
+        print(f"- {target}: {score} ({seconds[target]:.2f}s, v{versions[target]})")
+    print(f"Trained {len(models)} models in {elapsed:.2f}s")
@@ -2,18 +2,23 @@ import pandas as pd
 from sklearn.model_selection import train_test_split
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, confusion_matrix
-data = pd.read_csv(r"D:\GridGuard\Codes\grid_data.csv", encoding='ISO-8859-1')
+from dataset_cache import load
+from model_registry import data_hash, register
+data = load("grid_data", columns=['Voltage', 'Current', 'Frequency', 'Weather', 'Fault'])
 X = data[['Voltage', 'Current', 'Frequency', 'Weather']]
 y = data['Fault']
 X = X.copy()
-X['Weather'] = X['Weather'].astype('category').cat.codes
+weather = X['Weather'].astype(str).astype('category')
+X['Weather'] = weather.cat.codes
 X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.3, random_state=42)
 model = RandomForestClassifier()
 model.fit(X_train, y_train)
 y_pred = model.predict(X_test)
 accuracy = accuracy_score(y_test, y_pred)
 conf_matrix = confusion_matrix(y_test, y_pred)
-print("✅ Model trained successfully!")
+version = register("Fault", model, list(X.columns), encoders={'Weather': weather.cat.categories.tolist()},
+                   data_hash=data_hash(data), metrics={'accuracy': accuracy}, task="classification")
+print(f"✅ Model trained successfully! (registered as Fault v{version})")
 print(f"📊 Accuracy: {accuracy*100:.2f}%")
 print("🧮 Confusion Matrix:")
 print(conf_matrix)
@@ -0,0 +1,117 @@
+import argparse
+import json
+import os
+import numpy as np
+import model_registry
+from train_all_models import CLASS_TARGETS, REG_TARGETS
+
+# Output transform per objective; base_score is stored in output space and mapped back to a margin
+_TRANSFORMS = {
+    "reg:squarederror": "identity", "reg:squaredlogerror": "identity", "reg:pseudohubererror": "identity",
+    "reg:absoluteerror": "identity", "reg:quantileerror": "identity", "binary:logitraw": "identity",
+    "reg:logistic": "sigmoid", "binary:logistic": "sigmoid",
+    "multi:softprob": "softmax", "multi:softmax": "argmax",
+    "count:poisson": "exp", "reg:gamma": "exp", "reg:tweedie": "exp",
+}
+EXPORT_NAME = "trees.npz"
+
+
+def _floats(value):
+    return [float(v) for v in str(value).strip("[]").split(",") if v.strip()]
+
+
+def _base_margin(score, transform, groups):
+    score = np.resize(np.asarray(_floats(score), dtype=np.float64), groups)
+    if transform == "sigmoid":
+        score = np.log(score / (1.0 - score))
+    elif transform == "exp":
+        score = np.log(score)
+    return score.astype(np.float32)
+
+
+def _depth(left, right):
+    depth, frontier = 0, [0]
+    while frontier:
+        frontier = [c for n in frontier for c in (left[n], right[n]) if c >= 0]
+        depth += bool(frontier)
+    return depth
+
+
+def flatten(booster, num_rounds=None):
+    # Booster -> flat node arrays with global child indices; leaves have feature -1. An early-stopped
+    # booster is cut at its best round unless num_rounds says otherwise
+    if num_rounds is None and booster.attr("best_iteration") is not None:
+        num_rounds = int(booster.attr("best_iteration")) + 1
+    model = json.loads(booster.save_raw(raw_format="json"))["learner"]
+    gbm = model["gradient_booster"]
+    if gbm["name"] != "gbtree":
+        raise ValueError(f"Only gbtree boosters can be exported, not {gbm['name']}")
+    objective = model["objective"]["name"]
+    if objective not in _TRANSFORMS:
+        raise ValueError(f"Unsupported objective {objective}")
+    transform = _TRANSFORMS[objective]
+    groups = max(int(model["learner_model_param"].get("num_class", 0)), 1)
+
+    trees, info = gbm["model"]["trees"], np.asarray(gbm["model"]["tree_info"], dtype=np.int32)
+    if num_rounds is not None:
+        trees, info = trees[:num_rounds * groups], info[:num_rounds * groups]
+    parts = {k: [] for k in ("feature", "threshold", "left", "right", "default_left", "value")}
+    roots, depth, offset = [], 0, 0
+    for tree in trees:
+        if any(tree.get("split_type", [])):
+            raise ValueError("Categorical splits are not supported; export models trained on encoded codes")
+        left = np.asarray(tree["left_children"], dtype=np.int32)
+        right = np.asarray(tree["right_children"], dtype=np.int32)
+        leaf = left < 0
+        cond = np.asarray(tree["split_conditions"], dtype=np.float32)
+        parts["feature"].append(np.where(leaf, -1, np.asarray(tree["split_indices"], dtype=np.int32)))
+        parts["threshold"].append(np.where(leaf, np.float32(0), cond))
+        parts["left"].append(np.where(leaf, -1, left + offset))
+        parts["right"].append(np.where(leaf, -1, right + offset))
+        parts["default_left"].append(np.asarray(tree["default_left"], dtype=bool))
+        parts["value"].append(np.where(leaf, cond, np.float32(0)))
+        roots.append(offset)
+        depth = max(depth, _depth(left, right))
+        offset += len(left)
+
+    # Trees grouped by output column, each group in boosting order
+    order = np.argsort(info, kind="stable").astype(np.int32)
+    group_start = np.searchsorted(info[order], np.arange(groups + 1)).astype(np.int32)
+    arrays = {k: np.concatenate(v) if v else np.zeros(0) for k, v in parts.items()}
+    arrays["feature"] = arrays["feature"].astype(np.int32)
+    arrays["threshold"] = arrays["threshold"].astype(np.float32)
+    arrays["value"] = arrays["value"].astype(np.float32)
+    arrays.update(roots=np.asarray(roots, dtype=np.int32), order=order, group_start=group_start,
+                  base_margin=_base_margin(model["learner_model_param"]["base_score"], transform, groups))
+    return arrays, {"objective": objective, "transform": transform, "depth": depth, "trees": len(trees)}
+
+
+def export(booster, path, features, task=None, classes=None, encoders=None, num_rounds=None):
+    arrays, meta = flatten(booster, num_rounds)
+    meta.update(features=list(features), task=task, classes=classes, encoders=encoders or {})
+    tmp = path + ".tmp.npz"
+    np.savez(tmp, meta=np.array(json.dumps(meta)), **arrays)
+    os.replace(tmp, path)
+    return path
+
+
+def export_registered(name, version=None, registry_dir=model_registry.REGISTRY_DIR):
+    # Writes trees.npz into the registry version folder, so it ships with the model's metadata
+    entry = model_registry.load(name, version, registry_dir)
+    if entry.meta["kind"] != "xgboost":
+        raise ValueError(f"{name} v{entry.version} is not an XGBoost model")
+    return export(entry.model, os.path.join(entry.folder, EXPORT_NAME), entry.features, entry.meta["task"],
+                  entry.meta.get("classes"), entry.encoders)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export registered XGBoost models as flat NumPy trees")
+    parser.add_argument("names", nargs="*", default=CLASS_TARGETS + REG_TARGETS + ["Blackout_Risk"])
+    parser.add_argument("--registry", default=model_registry.REGISTRY_DIR)
+    args = parser.parse_args()
+
+    for name in args.names:
+        try:
+            print(f"{name}: {export_registered(name, registry_dir=args.registry)}")
+        except (FileNotFoundError, ValueError) as exc:
+            print(f"{name}: skipped ({exc})")
@@ -0,0 +1,104 @@
+import json
+import numpy as np
+
+# Only numpy: this module is what runs on the Pi, next to the exported trees.npz
+
+CHUNK_ROWS = 4096
+
+
+def _sigmoid(x):
+    return np.float32(1.0) / (np.float32(1.0) + np.exp(-x))
+
+
+def _softmax(x):
+    e = np.exp(x - x.max(axis=1, keepdims=True))
+    return e / e.sum(axis=1, keepdims=True)
+
+
+class TreePredictor:
+    # A tree ensemble as flat node arrays; every tree of a batch of rows is walked one level per step
+    def __init__(self, path):
+        with np.load(path, allow_pickle=False) as data:
+            self.feature = data["feature"]
+            self.threshold = data["threshold"]
+            self.left = data["left"]
+            self.right = data["right"]
+            self.default_left = data["default_left"]
+            self.value = data["value"]
+            self.roots = data["roots"]
+            self.order = data["order"]
+            self.group_start = data["group_start"]
+            self.base_margin = data["base_margin"]
+            self.meta = json.loads(str(data["meta"]))
+        self.depth = int(self.meta["depth"])
+        self.transform = self.meta["transform"]
+        self.features = self.meta["features"]
+        self.encoders = {c: {v: np.float32(i) for i, v in enumerate(classes)}
+                         for c, classes in self.meta.get("encoders", {}).items()}
+
+    def matrix(self, rows):
+        # List of {feature: value} dicts -> float32 matrix; categories by the training codes, unknown -> NaN
+        X = np.full((len(rows), len(self.features)), np.nan, dtype=np.float32)
+        for i, row in enumerate(rows):
+            for j, f in enumerate(self.features):
+                v = row.get(f)
+                if f in self.encoders:
+                    v = self.encoders[f].get(str(v), np.nan)
+                X[i, j] = np.nan if v is None else v
+        return X
+
+    def leaves(self, X):
+        # (rows, trees) leaf values
+        n = X.shape[0]
+        node = np.repeat(self.roots[None, :], n, axis=0)
+        rows = np.arange(n)[:, None]
+        for _ in range(self.depth):
+            f = self.feature[node]
+            inner = f >= 0
+            if not inner.any():
+                break
+            x = X[rows, np.where(inner, f, 0)]
+            go_left = np.where(np.isnan(x), self.default_left[node], x < self.threshold[node])
+            node = np.where(inner, np.where(go_left, self.left[node], self.right[node]), node)
+        return self.value[node]
+
+    def margin(self, X):
+        X = np.atleast_2d(np.asarray(X, dtype=np.float32))
+        out = np.empty((X.shape[0], len(self.base_margin)), dtype=np.float32)
+        for start in range(0, X.shape[0], CHUNK_ROWS):
+            leaf = self.leaves(X[start:start + CHUNK_ROWS])[:, self.order]
+            for g in range(len(self.base_margin)):
+                lo, hi = self.group_start[g], self.group_start[g + 1]
+                # Base score first, then trees in boosting order, summed in float32 as xgboost does
+                acc = np.concatenate([np.full((leaf.shape[0], 1), self.base_margin[g], dtype=np.float32),
+                                      leaf[:, lo:hi]], axis=1)
+                out[start:start + CHUNK_ROWS, g] = np.cumsum(acc, axis=1, dtype=np.float32)[:, -1]
+        return out
+
+    def raw(self, X):
+        # Same output as Booster.inplace_predict: probabilities for classifiers, values for regressors
+        m = self.margin(X)
+        if self.transform == "sigmoid":
+            m = _sigmoid(m)
+        elif self.transform == "softmax":
+            return _softmax(m)
+        elif self.transform == "exp":
+            m = np.exp(m)
+        elif self.transform == "argmax":
+            return m.argmax(axis=1).astype(np.float32)
+        return m[:, 0] if m.shape[1] == 1 else m
+
+    def predict(self, X):
+        out = self.raw(X)
+        if self.meta.get("task") != "classification":
+            return out
+        if self.transform == "argmax":
+            codes = out.astype(int)
+        else:
+            codes = out.argmax(axis=1) if out.ndim > 1 else (out > 0.5).astype(int)
+        classes = self.meta.get("classes")
+        return np.asarray(classes, dtype=object)[codes] if classes else codes
+
+
+def load(path):
+    return TreePredictor(path)
@@ -0,0 +1,124 @@
+import argparse
+import os
+import random
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+import requests
+from requests.adapters import HTTPAdapter
+
+API_KEY = os.environ.get("OPENWEATHER_API_KEY")
+CITY_LIST = ["Chennai", "Mumbai", "Delhi", "Kolkata", "Bangalore", "Hyderabad", "Ahmedabad"]
+PROVIDER = os.environ.get("GRIDGUARD_WEATHER_PROVIDER", "openweather")
+TTL = 600.0
+REFRESH_EVERY = 300.0
+TIMEOUT = 5.0
+
+
+class OpenWeatherProvider:
+    # Current conditions from OpenWeather over one pooled session, shared by the refresh threads. The key
+    # only comes from the environment
+    url = "http://api.openweathermap.org/data/2.5/weather"
+
+    def __init__(self, api_key=API_KEY, timeout=TIMEOUT, pool_size=8):
+        if not api_key:
+            raise RuntimeError("OPENWEATHER_API_KEY is not set")
+        self.api_key, self.timeout = api_key, timeout
+        self.session = requests.Session()
+        self.session.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+        self.session.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=pool_size))
+
+    def fetch(self, city):
+        resp = self.session.get(self.url, params={"q": city, "appid": self.api_key, "units": "metric"},
+                                timeout=self.timeout)
+        data = resp.json()
+        if "main" not in data:
+            raise RuntimeError(f"{city}: {data.get('message', resp.status_code)}")
+        return {"temp": data["main"]["temp"], "humidity": data["main"]["humidity"],
+                "wind_speed": round(data["wind"]["speed"] * 3.6, 2),  # Convert to km/h
+                "rainfall_mm": data.get("rain", {}).get("1h", 0.0)}
+
+
+class StubProvider:
+    # Offline readings: fixed ones when given, otherwise per-city pseudo-random readings that change every
+    # `step` seconds. Cities in `fail` raise, to exercise the stale fallback
+    def __init__(self, readings=None, fail=(), step=60.0):
+        self.readings, self.fail, self.step = readings or {}, set(fail), step
+
+    def fetch(self, city):
+        if city in self.fail:
+            raise RuntimeError(f"{city}: stub failure")
+        if city in self.readings:
+            return dict(self.readings[city])
+        rng = random.Random(zlib.crc32(city.encode()) + int(time.time() // self.step))
+        return {"temp": round(rng.uniform(22, 38), 1), "humidity": rng.randint(40, 95),
+                "wind_speed": round(rng.uniform(0, 60), 2), "rainfall_mm": round(max(0.0, rng.gauss(2, 6)), 1)}
+
+
+PROVIDERS = {"openweather": OpenWeatherProvider, "stub": StubProvider}
+
+
+class WeatherCache:
+    # Latest reading per city, shared by every dashboard session. A background thread refreshes all cities
+    # at once on a thread pool; a failed fetch keeps the previous reading, which is then served as stale.
+    # Reads never wait on the network, except a first read of a city nothing has been fetched for yet
+    def __init__(self, provider=None, cities=CITY_LIST, ttl=TTL, refresh_every=REFRESH_EVERY, workers=8):
+        self.provider = provider or PROVIDERS[PROVIDER]()
+        self.cities, self.ttl, self.refresh_every = list(cities), ttl, refresh_every
+        self.pool = ThreadPoolExecutor(workers, thread_name_prefix="weather")
+        self.entries = {}
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def _fetch(self, city):
+        try:
+            data, error = self.provider.fetch(city), None
+        except Exception as exc:  # timeouts, HTTP and API errors alike
+            data, error = None, str(exc)
+        with self.lock:
+            old = self.entries.get(city)
+            if data is not None:
+                entry = {"data": data, "fetched_at": time.time(), "error": None}
+            elif old is not None:
+                entry = dict(old, error=error)
+            else:
+                entry = {"data": None, "fetched_at": None, "error": error}
+            self.entries[city] = entry
+        return entry
+
+    def refresh(self):
+        return dict(zip(self.cities, self.pool.map(self._fetch, self.cities)))
+
+    def _loop(self):
+        while True:
+            self.refresh()
+            time.sleep(self.refresh_every)
+
+    def start(self):
+        if self.thread is None:
+            self.thread = threading.Thread(target=self._loop, name="weather-refresh", daemon=True)
+            self.thread.start()
+        return self
+
+    def get(self, city):
+        # The entry plus its age in seconds and whether it is past the TTL or its last refresh failed
+        with self.lock:
+            entry = self.entries.get(city)
+        if entry is None:
+            entry = self._fetch(city)
+        age = time.time() - entry["fetched_at"] if entry["fetched_at"] else None
+        return dict(entry, age=age, stale=bool(entry["error"]) or age is None or age > self.ttl)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Fetch current weather for every dashboard city")
+    parser.add_argument("--provider", choices=sorted(PROVIDERS), default=PROVIDER)
+    args = parser.parse_args()
+
+    cache = WeatherCache(PROVIDERS[args.provider]())
+    t0 = time.perf_counter()
+    results = cache.refresh()
+    print(f"{len(results)} cities in {time.perf_counter() - t0:.2f}s")
+    for city, entry in results.items():
+        print(f"{city:10s} {entry['data'] if entry['data'] else 'error: ' + entry['error']}")
@@ -0,0 +1,53 @@
+import threading
+import time
+from sqlalchemy import text
+import event_store
+
+POLL_EVERY = 2.0
+
+
+class ZonePoller:
+    # Latest state of every zone, kept current by one background poller per process. Each poll reads only
+    # the resilience_data rows whose event_id is past the high-water mark: a quiet tick looks at one row per
+    # zone, never the event history, and returns nothing. Every merged change bumps `version`, and
+    # `changed[zone]` records the version that last touched the zone, so sessions can tell which to redraw
+    def __init__(self, engine, interval=POLL_EVERY):
+        self.engine, self.interval = engine, interval
+        self.zones, self.changed = {}, {}
+        self.version = self.last_event = 0
+        self.error = None
+        self.lock = threading.Lock()
+        self.thread = None
+
+    def poll(self):
+        with self.engine.connect() as conn:
+            rows = conn.execute(text(f"SELECT * FROM {event_store.LATEST} WHERE event_id > :last ORDER BY event_id"),
+                                {"last": self.last_event}).mappings().all()
+        with self.lock:
+            for row in rows:
+                self.version += 1
+                self.zones[row["zone"]] = dict(row)
+                self.changed[row["zone"]] = self.version
+                self.last_event = max(self.last_event, row["event_id"])
+        return len(rows)
+
+    def _loop(self):
+        while True:
+            try:
+                self.poll()
+                self.error = None
+            except Exception as exc:  # keep serving the last state; the next tick retries
+                self.error = str(exc)
+            time.sleep(self.interval)
+
+    def start(self):
+        if self.thread is None:
+            self.poll()
+            self.thread = threading.Thread(target=self._loop, name="zone-poller", daemon=True)
+            self.thread.start()
+        return self
+
+    def snapshot(self, since=0):
+        # (version, {zone: row}) of the zones changed after version `since`; since=0 gives every zone
+        with self.lock:
+            return self.version, {z: dict(self.zones[z]) for z, v in self.changed.items() if v > since}
@@ -0,0 +1,104 @@
+import warnings
+import numpy as np
+import scipy.sparse as sp
+from scipy.sparse.csgraph import connected_components
+from scipy.sparse.linalg import LinearOperator, eigsh, lobpcg, splu
+from sklearn.cluster import k_means
+from sklearn.utils import check_random_state
+from grid_topology import embed, match_zones, normalized_laplacian, spectral_embedding
+
+# Shift for the LOBPCG preconditioner, below the smallest nonzero eigenvalue of the feeder graph
+PRECONDITIONER_SHIFT = 1e-4
+
+
+def _touching(W, dd, nodes, mask):
+    # Normalized weights W_ij / (d_i d_j) for every entry whose row or column is in `nodes`
+    R = W[nodes].tocoo()
+    i, j = nodes[R.row], R.col
+    val = R.data / (dd[i] * dd[j])
+    m = ~mask[j]
+    rows, cols = np.concatenate([i, j[m]]), np.concatenate([j, i[m]])
+    return sp.csr_matrix((np.concatenate([val, val[m]]), (rows, cols)), shape=W.shape)
+
+
+class IncrementalPartitioner:
+    def __init__(self, W, k=7, random_state=42, labels=None, tol=1e-5, maxiter=200):
+        self.k, self.tol, self.maxiter = k, tol, maxiter
+        rng = check_random_state(random_state)
+        self.W = sp.csr_matrix(W, dtype=float, copy=True)
+        self.W.setdiag(0)
+        self.W.eliminate_zeros()
+        self.L, self.dd = normalized_laplacian(self.W)
+
+        emb, self.vecs = spectral_embedding(self.W, k, random_state=rng)
+        _, computed, _ = k_means(emb, k, random_state=rng, n_init=10)
+        # Zone IDs supplied by the caller (e.g. hand-matched to a reference map) are kept from here on
+        self.labels = computed if labels is None else match_zones(computed, np.asarray(labels), k)
+        self.fallbacks = 0
+
+    def update(self, changes):
+        # changes: iterable of (u, v, weight); weight 0 opens the line, > 0 closes it or changes its weight
+        latest = {}
+        for u, v, w in changes:
+            if u != v:
+                latest[(min(u, v), max(u, v))] = float(w)
+        if not latest:
+            return self.labels
+
+        u, v = (np.array(c, dtype=np.int64) for c in zip(*latest))
+        w = np.fromiter(latest.values(), dtype=float)
+        old = np.asarray(self.W[u, v]).ravel()
+        n = self.W.shape[0]
+        dW = sp.csr_matrix((np.concatenate([w - old, w - old]), (np.concatenate([u, v]), np.concatenate([v, u]))),
+                           shape=(n, n))
+        W = self.W + dW
+        W.eliminate_zeros()
+
+        # Only buses at the ends of changed lines get a new degree, so only their rows/columns of L move
+        nodes = np.unique(np.concatenate([u, v]))
+        mask = np.zeros(n, dtype=bool)
+        mask[nodes] = True
+        dd = self.dd.copy()
+        deg = np.sqrt(np.asarray(W[nodes].sum(axis=1)).ravel())
+        deg[deg == 0] = 1.0
+        dd[nodes] = deg
+        L = self.L - _touching(W, dd, nodes, mask) + _touching(self.W, self.dd, nodes, mask)
+
+        vecs = self._eigenvectors(L, W, dd)
+        emb = embed(vecs, dd)
+        init = np.vstack([emb[self.labels == z].mean(axis=0) for z in range(self.k)])
+        _, computed, _ = k_means(emb, self.k, init=init, n_init=1)
+
+        self.W, self.L, self.dd, self.vecs = W, L, dd, vecs
+        self.labels = match_zones(computed, self.labels, self.k)
+        return self.labels
+
+    def _eigenvectors(self, L, W, dd):
+        # The zero eigenvalues are known exactly: one D^1/2 indicator per connected component. They are
+        # passed to LOBPCG as constraints, since a nearly degenerate cluster at 0 stalls its Rayleigh-Ritz
+        n, k = L.shape[0], self.k
+        c, comp = connected_components(W, directed=False)
+        Y = np.zeros((n, c))
+        Y[np.arange(n), comp] = dd
+        Y /= np.linalg.norm(Y, axis=0)
+        if c >= k:
+            return Y[:, :k]
+
+        # Previous eigenvectors, minus their null-space part, are an almost-converged block after a local
+        # change; the rest of the spectrum sits near 0 against a top of 2, so (L + shift I)^-1 preconditions
+        X = self.vecs - Y @ (Y.T @ self.vecs)
+        X = X[:, np.argsort(-np.linalg.norm(X, axis=0))[:k - c]]
+        lu = splu(sp.csc_matrix(L + PRECONDITIONER_SHIFT * sp.identity(n)))
+        M = LinearOperator((n, n), matvec=lu.solve, matmat=lu.solve, dtype=float)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", UserWarning)
+            vals, vecs = lobpcg(L, X, Y=Y, M=M, largest=False, tol=self.tol, maxiter=self.maxiter)
+        order = np.argsort(vals)
+        vals, vecs = vals[order], vecs[:, order]
+        residual = np.linalg.norm(L @ vecs - vecs * vals, axis=0)
+        if np.all(np.isfinite(residual)) and residual.max() <= 10 * self.tol:
+            return np.hstack([Y, vecs])
+
+        self.fallbacks += 1
+        _, vecs = eigsh(-L, k=k, sigma=1.0, which="LM", tol=0, v0=self.vecs.sum(axis=1))
+        return vecs[:, ::-1]